@@ -0,0 +1,94 @@
+"""
+HealthBot Monitor - Admission Control
+Caps concurrent upstream Gemini calls with a bounded, time-limited wait queue
+"""
+import asyncio
+import math
+import time
+from typing import Dict
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status to return"""
+    
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"Request rejected by admission control: {reason}")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Max in-flight semaphore with a bounded wait queue
+    Requests beyond `max_in_flight` wait in line; if `max_queue` are
+    already waiting they are rejected at once (429), and if a slot does
+    not free up within `queue_timeout_seconds` they give up (503). Both
+    rejections suggest a Retry-After based on how fast slots turn over.
+    """
+    
+    def __init__(self, max_in_flight: int = 16, max_queue: int = 64,
+                 queue_timeout_seconds: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        
+        # Exponentially weighted average time a slot is held
+        self.average_hold_seconds = 1.0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+    
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained"""
+        turns = (self.waiting + 1) / self.max_in_flight
+        return max(1, math.ceil(turns * self.average_hold_seconds))
+    
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the time spent waiting in ms"""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+        
+        if self.waiting >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected("queue_full", 429, self.retry_after())
+        
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.rejected_timeout += 1
+            raise AdmissionRejected("queue_timeout", 503, self.retry_after())
+        finally:
+            self.waiting -= 1
+        
+        self.in_flight += 1
+        self.admitted += 1
+        return (time.monotonic() - start) * 1000
+    
+    def release(self, held_seconds: float):
+        """Free a slot and fold its hold time into the turnover estimate"""
+        self.in_flight -= 1
+        self._semaphore.release()
+        self.average_hold_seconds = 0.8 * self.average_hold_seconds + 0.2 * held_seconds
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "average_hold_seconds": round(self.average_hold_seconds, 3)
+        }
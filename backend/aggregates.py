@@ -0,0 +1,346 @@
+"""
+HealthBot Monitor - Metric Aggregates
+Constant-memory summaries used by DatadogMetrics for local reporting
+
+Both aggregates keep their state in a flat buffer, so they can live in
+ordinary process memory or in a region shared by several workers (see
+metrics_store.py); the readers below combine any number of them.
+"""
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (ms) of the fixed latency histogram buckets exported to Prometheus
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000
+)
+
+
+class LatencySketch:
+    """
+    Running latency aggregate with a log-bucketed quantile sketch
+    Keeps count/sum/min/max plus a fixed array of bucket counts (DDSketch
+    style), so recording a value and reading p50/p90/p99 cost the same no
+    matter how many values have been seen. Quantiles are accurate to
+    `relative_accuracy` for values between `min_value` and `max_value`.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01,
+                 min_value: float = 0.1, max_value: float = 600_000.0,
+                 buffer: Optional[memoryview] = None):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.floor(math.log(min_value) / self._log_gamma)
+        
+        # Bucket 0 holds everything <= min_value, the last one everything above max_value
+        size = self.bucket_count(relative_accuracy, min_value, max_value)
+        if buffer is None:
+            buffer = memoryview(bytearray(self.nbytes(relative_accuracy, min_value, max_value)))
+        # count, total, min, max followed by the bucket counts
+        self._stats = buffer[:32].cast("d")
+        self.buckets = buffer[32:32 + 8 * size].cast("Q")
+    
+    @staticmethod
+    def bucket_count(relative_accuracy: float = 0.01,
+                     min_value: float = 0.1, max_value: float = 600_000.0) -> int:
+        log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        offset = math.floor(math.log(min_value) / log_gamma)
+        return math.ceil(math.log(max_value) / log_gamma) - offset + 1
+    
+    @classmethod
+    def nbytes(cls, relative_accuracy: float = 0.01,
+               min_value: float = 0.1, max_value: float = 600_000.0) -> int:
+        """Size of the buffer backing a sketch with these parameters"""
+        return 32 + 8 * cls.bucket_count(relative_accuracy, min_value, max_value)
+    
+    @property
+    def count(self) -> int:
+        return int(self._stats[0])
+    
+    @property
+    def total(self) -> float:
+        return self._stats[1]
+    
+    @property
+    def min(self) -> float:
+        return self._stats[2]
+    
+    @property
+    def max(self) -> float:
+        return self._stats[3]
+    
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = math.ceil(math.log(value) / self._log_gamma) - self._offset
+        return min(index, len(self.buckets) - 1)
+    
+    def _bucket_value(self, index: int) -> float:
+        """Representative value of a bucket (midpoint in relative terms)"""
+        if index == 0:
+            # Only values <= min_value land here, so the observed minimum is exact enough
+            return self.min
+        return 2 * self.gamma ** (index + self._offset) / (self.gamma + 1)
+    
+    def add(self, value: float):
+        """Record a single value"""
+        stats = self._stats
+        if stats[0] == 0:
+            stats[2] = stats[3] = value
+        else:
+            if value < stats[2]:
+                stats[2] = value
+            if value > stats[3]:
+                stats[3] = value
+        # Buckets first, so a concurrent reader never sees a count without its bucket
+        self.buckets[self._index(value)] += 1
+        stats[1] += value
+        stats[0] += 1
+    
+    @classmethod
+    def merged(cls, sketches: Sequence["LatencySketch"]) -> "LatencySketch":
+        """A new sketch holding everything recorded in `sketches` (same parameters)"""
+        first = sketches[0]
+        result = cls(first.relative_accuracy, first.min_value, first.max_value)
+        stats = result._stats
+        buckets = result.buckets
+        for sketch in sketches:
+            if sketch.count == 0:
+                continue
+            if stats[0] == 0:
+                stats[2], stats[3] = sketch.min, sketch.max
+            else:
+                stats[2] = min(stats[2], sketch.min)
+                stats[3] = max(stats[3], sketch.max)
+            stats[0] += sketch.count
+            stats[1] += sketch.total
+            for index, bucket_count in enumerate(sketch.buckets):
+                if bucket_count:
+                    buckets[index] += bucket_count
+        return result
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def quantile(self, q: float) -> float:
+        """Estimate the q-th quantile (0 <= q <= 1)"""
+        if self.count == 0:
+            return 0.0
+        
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen > rank:
+                # Never report outside the observed range
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, float]:
+        """Mean, p50/p90/p99 and max in a single bucket walk"""
+        if self.count == 0:
+            return {"avg": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        
+        targets = [("p50", 0.5), ("p90", 0.9), ("p99", 0.99)]
+        result = {"avg": self.mean, "max": self.max}
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while targets and seen > targets[0][1] * (self.count - 1):
+                name, _ = targets.pop(0)
+                result[name] = min(max(self._bucket_value(index), self.min), self.max)
+            if not targets:
+                break
+        return result
+
+
+
+class FixedHistogram:
+    """
+    Cumulative-style histogram with fixed upper bounds (Prometheus "le")
+    Holds a sum and one count per bound plus an overflow (+Inf) bucket;
+    observing a value is a bisect and two in-place increments.
+    """
+    
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS,
+                 buffer: Optional[memoryview] = None):
+        self.bounds = tuple(bounds)
+        if buffer is None:
+            buffer = memoryview(bytearray(self.nbytes(self.bounds)))
+        self._sum = buffer[:8].cast("d")
+        # Non-cumulative counts; the last one is everything above the largest bound
+        self.counts = buffer[8:8 + 8 * (len(self.bounds) + 1)].cast("Q")
+    
+    @staticmethod
+    def nbytes(bounds: Sequence[float] = LATENCY_BUCKETS_MS) -> int:
+        """Size of the buffer backing a histogram with these bounds"""
+        return 8 + 8 * (len(bounds) + 1)
+    
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+    
+    @property
+    def total(self) -> float:
+        return self._sum[0]
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self._sum[0] += value
+    
+    @classmethod
+    def merged(cls, histograms: Sequence["FixedHistogram"]) -> "FixedHistogram":
+        """A new histogram holding everything observed in `histograms` (same bounds)"""
+        result = cls(histograms[0].bounds)
+        counts = result.counts
+        for histogram in histograms:
+            result._sum[0] += histogram.total
+            for index, bucket_count in enumerate(histogram.counts):
+                counts[index] += bucket_count
+        return result
+
+
+class RollingWindow:
+    """
+    Time-bucketed rolling counters
+    One bucket per `resolution_seconds`, kept in a ring of parallel arrays
+    covering `retention_seconds`. Each bucket remembers which time slot it
+    holds, so stale slots are reset lazily on write and skipped on read.
+    Answering "the last N seconds" costs O(N / resolution) regardless of
+    traffic.
+    """
+    
+    # slots, requests, errors, tokens, latency_sum, latency_max
+    _ARRAYS = ("q", "Q", "Q", "Q", "d", "d")
+    
+    def __init__(self, retention_seconds: int = 3600, resolution_seconds: int = 1,
+                 buffer: Optional[memoryview] = None):
+        self.resolution = resolution_seconds
+        self.size = max(1, retention_seconds // resolution_seconds)
+        
+        if buffer is None:
+            buffer = memoryview(bytearray(self.nbytes(retention_seconds, resolution_seconds)))
+        # A zero-filled buffer is a valid empty window: slot 0 (the epoch) is never read
+        step = 8 * self.size
+        (self.slots, self.requests, self.errors, self.tokens,
+         self.latency_sum, self.latency_max) = (
+            buffer[i * step:(i + 1) * step].cast(fmt) for i, fmt in enumerate(self._ARRAYS)
+        )
+    
+    @classmethod
+    def nbytes(cls, retention_seconds: int = 3600, resolution_seconds: int = 1) -> int:
+        """Size of the buffer backing a window with these parameters"""
+        return len(cls._ARRAYS) * 8 * max(1, retention_seconds // resolution_seconds)
+    
+    def _slot(self, timestamp: float) -> int:
+        return int(timestamp // self.resolution)
+    
+    def record(self, timestamp: float, latency_ms: float, tokens: int = 0, error: bool = False):
+        """Add one request to the bucket for `timestamp`"""
+        slot = self._slot(timestamp)
+        i = slot % self.size
+        if self.slots[i] != slot:
+            self.slots[i] = slot
+            self.requests[i] = self.errors[i] = self.tokens[i] = 0
+            self.latency_sum[i] = self.latency_max[i] = 0.0
+        
+        self.requests[i] += 1
+        self.tokens[i] += tokens
+        self.latency_sum[i] += latency_ms
+        if latency_ms > self.latency_max[i]:
+            self.latency_max[i] = latency_ms
+        if error:
+            self.errors[i] += 1
+    
+    def query(self, seconds: int, now: float) -> Dict[str, float]:
+        """Aggregate the buckets covering the last `seconds` up to `now`"""
+        return query_windows([self], seconds, now)
+    
+    def series(self, start: float, end: float, step_seconds: int) -> List[Dict[str, float]]:
+        """Downsample buckets between `start` and `end` (see series_windows)"""
+        return series_windows([self], start, end, step_seconds)
+
+
+def query_windows(windows: Sequence[RollingWindow], seconds: int, now: float) -> Dict[str, float]:
+    """Aggregate the last `seconds` across windows with the same resolution and size"""
+    first_window = windows[0]
+    size = first_window.size
+    last = first_window._slot(now)
+    span = min(size, max(1, seconds // first_window.resolution))
+    
+    requests = errors = tokens = 0
+    latency_sum = latency_max = 0.0
+    for window in windows:
+        for slot in range(last - span + 1, last + 1):
+            i = slot % size
+            if window.slots[i] != slot:
+                continue
+            requests += window.requests[i]
+            errors += window.errors[i]
+            tokens += window.tokens[i]
+            latency_sum += window.latency_sum[i]
+            latency_max = max(latency_max, window.latency_max[i])
+    
+    window_seconds = span * first_window.resolution
+    return {
+        "window_seconds": window_seconds,
+        "request_count": requests,
+        "error_count": errors,
+        "error_rate_percent": round(errors / requests * 100, 2) if requests else 0.0,
+        "average_response_time_ms": round(latency_sum / requests, 2) if requests else 0.0,
+        "max_response_time_ms": round(latency_max, 2),
+        "tokens_used": tokens,
+        "average_tokens_per_request": round(tokens / requests, 2) if requests else 0.0,
+        "tokens_per_minute": round(tokens * 60 / window_seconds, 2)
+    }
+
+
+def series_windows(windows: Sequence[RollingWindow], start: float, end: float,
+                   step_seconds: int) -> List[Dict[str, float]]:
+    """
+    Downsample buckets between `start` and `end` into `step_seconds` points,
+    summed across windows with the same resolution and size
+    
+    `step_seconds` must be a multiple of the resolution. Steps without
+    traffic are omitted, and each point is stamped with the start of its step.
+    """
+    first_window = windows[0]
+    size = first_window.size
+    resolution = first_window.resolution
+    per_step = max(1, step_seconds // resolution)
+    first = first_window._slot(start)
+    last = first_window._slot(end)
+    # Never read further back than the ring holds
+    first = max(first, last - size + 1)
+    # Align steps to wall-clock multiples so points stay stable across polls
+    first -= first % per_step
+    
+    points = []
+    for step_start in range(first, last + 1, per_step):
+        requests = errors = tokens = 0
+        latency_sum = 0.0
+        for window in windows:
+            for slot in range(step_start, min(step_start + per_step, last + 1)):
+                i = slot % size
+                if window.slots[i] != slot:
+                    continue
+                requests += window.requests[i]
+                errors += window.errors[i]
+                tokens += window.tokens[i]
+                latency_sum += window.latency_sum[i]
+        
+        if requests:
+            points.append({
+                "timestamp": step_start * resolution,
+                "request_count": requests,
+                "average_response_time_ms": latency_sum / requests,
+                "error_rate_percent": errors / requests * 100,
+                "tokens_used": tokens
+            })
+    return points
@@ -0,0 +1,62 @@
+"""
+HealthBot Monitor - Chat Load Test
+Drives /chat in-process against a stub Gemini client with fixed latency
+and reports how throughput scales with concurrency.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --latency-ms 200 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Without this the per-client rate limit answers most requests with 429
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from benchmarks.stubs import FakeGeminiClient
+from main import app
+from gemini_service import gemini_service
+
+
+async def _run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> float:
+    """Send `total` chat requests with at most `concurrency` in flight, return req/s"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            response = await client.post("/chat", json={"message": f"load test {concurrency}-{i}"})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(latency_ms: float, total: int, levels: list):
+    gemini_service.client = FakeGeminiClient(latency_ms)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"stub latency: {latency_ms:.0f}ms, requests per level: {total}")
+        print(f"{'concurrency':>12} {'req/s':>10} {'speedup':>10}")
+        baseline = None
+        for concurrency in levels:
+            throughput = await _run_level(client, concurrency, total)
+            baseline = baseline or throughput
+            print(f"{concurrency:>12} {throughput:>10.1f} {throughput / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.latency_ms, args.requests, args.levels))
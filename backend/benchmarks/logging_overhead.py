@@ -0,0 +1,99 @@
+"""
+HealthBot Monitor - Logging Overhead Benchmark
+Times the log calls one /chat request makes (request_received,
+chat_completed, "Request tracked" and the debug metric lines) on the
+calling thread, with the original synchronous JSON sink and with the
+queued, sampled pipeline from log_pipeline.
+
+Run from the backend directory:
+    python -m benchmarks.logging_overhead --requests 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import structlog
+
+from log_pipeline import configure_logging, parse_sample_rates
+
+# Opt-in rates for the per-request events (LOG_SAMPLE_RATES); the default keeps everything
+SAMPLE_RATES = "request_received=0.1,Request tracked=0.1"
+
+
+def _log_event(logger, sampler, event_name: str, data: dict):
+    """Same shape as DatadogMetrics.log_event"""
+    if not sampler.keep(event_name):
+        return
+    log_data = {
+        "event_name": event_name,
+        "service": "healthbot-llm",
+        "env": "benchmark",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    log_data.update(data)
+    logger.info(None, msg=event_name, **log_data)
+
+
+def _one_request(logger, sampler, i: int):
+    _log_event(logger, sampler, "request_received", {"path": "/chat", "method": "POST"})
+    for metric in ("healthbot.request.latency", "healthbot.request.count"):
+        logger.debug("Metric buffered (Datadog not connected)", metric=metric, value=1.0)
+    logger.info("Request tracked", endpoint="chat", latency_ms=812.4, success=True, tokens=431)
+    _log_event(logger, sampler, "chat_completed", {
+        "conversation_id": f"conv-{i}",
+        "latency_ms": 812.4,
+        "tokens_used": 431,
+        "cached": False
+    })
+
+
+def run(name: str, requests: int, **options) -> float:
+    with open(os.devnull, "w") as sink:
+        pipeline = configure_logging(stream=sink, **options)
+        # A fresh proxy per scenario: loggers cache their processor chain on first use
+        logger = structlog.get_logger(f"benchmark.{name}")
+        for i in range(min(requests, 1000)):
+            _one_request(logger, pipeline.sampler, i)
+
+        start = time.perf_counter()
+        for i in range(requests):
+            _one_request(logger, pipeline.sampler, i)
+        elapsed = time.perf_counter() - start
+
+        pipeline.stop()
+        drained = time.perf_counter() - start
+
+    per_request = elapsed / requests * 1e6
+    stats = pipeline.stats()
+    print(
+        f"{name:>18} {per_request:>10.1f} {drained / requests * 1e6:>10.1f} "
+        f"{sum(stats['sampled_out'].values()):>9} {stats['dropped_queue_full']:>8}"
+    )
+    return per_request
+
+
+def main(requests: int):
+    print(f"{requests} simulated requests, LOG_LEVEL=INFO, output to {os.devnull}")
+    print(f"{'sink':>18} {'caller µs':>10} {'drained µs':>10} {'sampled':>9} {'dropped':>8}")
+
+    before = run("sync", requests, async_sink=False)
+    run("sync+sampling", requests, async_sink=False,
+        sample_rates=parse_sample_rates(SAMPLE_RATES))
+    run("queued", requests, async_sink=True, queue_size=requests * 4)
+    after = run("queued+sampling", requests, async_sink=True, queue_size=requests * 4,
+                sample_rates=parse_sample_rates(SAMPLE_RATES))
+
+    print(f"per-request logging on the request path: {before:.1f} µs -> {after:.1f} µs "
+          f"({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    main(args.requests)
@@ -0,0 +1,169 @@
+"""
+HealthBot Monitor - Benchmark Stubs
+Stand-ins for the two external services, so benchmarks measure this app
+rather than the network: a fake google-genai client with configurable
+latency, streaming and errors, and a local Datadog metrics intake.
+"""
+import asyncio
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Optional
+
+from google.genai import errors
+
+ANSWER = (
+    "Common cold symptoms include a runny or stuffy nose, sore throat, cough, "
+    "sneezing and a mild fever. Rest, fluids and over-the-counter remedies help; "
+    "see a doctor if symptoms last more than ten days or get worse."
+)
+
+
+def _usage(prompt_tokens: int, answer_tokens: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=answer_tokens,
+        total_token_count=prompt_tokens + answer_tokens,
+        cached_content_token_count=0
+    )
+
+
+class _FakeModels:
+    """client.aio.models: generate_content and generate_content_stream"""
+
+    def __init__(self, client: "FakeGeminiClient"):
+        self.client = client
+
+    async def generate_content(self, model, contents, config=None):
+        await self.client._upstream_call()
+        return SimpleNamespace(text=self.client.answer, usage_metadata=self.client.usage)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        await self.client._upstream_call()
+        return self._stream()
+
+    async def _stream(self):
+        client = self.client
+        words = client.answer.split(" ")
+        size = max(1, len(words) // client.stream_chunks)
+        for start in range(0, len(words), size):
+            if start:
+                await asyncio.sleep(client.chunk_interval_s)
+            last = start + size >= len(words)
+            text = " ".join(words[start:start + size]) + ("" if last else " ")
+            yield SimpleNamespace(text=text, usage_metadata=client.usage if last else None)
+
+
+class _FakeCaches:
+    """client.aio.caches: context caches always succeed"""
+
+    async def create(self, model, config=None):
+        return SimpleNamespace(name=f"cachedContents/bench-{model}")
+
+
+class FakeGeminiClient:
+    """
+    genai.Client replacement exposing only the async surface GeminiService uses
+    Each upstream call (including each retry or fallback attempt) waits
+    latency_ms ± jitter_ms and fails with a 503 ServerError with probability
+    error_rate; streamed answers arrive in `stream_chunks` pieces spaced
+    `chunk_interval_ms` apart.
+    """
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 0, error_rate: float = 0.0,
+                 stream_chunks: int = 8, chunk_interval_ms: float = 20, answer: str = ANSWER,
+                 seed: Optional[int] = None):
+        self.latency_s = latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.chunk_interval_s = chunk_interval_ms / 1000
+        self.answer = answer
+        self.usage = _usage(120, len(answer) // 4)
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self.aio = SimpleNamespace(models=_FakeModels(self), caches=_FakeCaches())
+
+    async def _upstream_call(self):
+        self.calls += 1
+        delay = self.latency_s + self._random.uniform(-self.jitter_s, self.jitter_s)
+        await asyncio.sleep(max(0.0, delay))
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise errors.ServerError(503, {"error": {
+                "code": 503, "message": "The model is overloaded (fake)", "status": "UNAVAILABLE"
+            }})
+
+
+class FakeDatadogIntake:
+    """
+    Local HTTP server answering the Datadog metrics API (POST /api/v1/series)
+    Runs in a background thread and counts payloads, series and points, so
+    a benchmark exercises the real MetricShipper and API client end to end.
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency_s = latency_ms / 1000
+        self.payloads = 0
+        self.series = 0
+        self.points = 0
+        self._lock = threading.Lock()
+        intake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                encoding = self.headers.get("Content-Encoding", "")
+                if encoding == "gzip":
+                    body = gzip.decompress(body)
+                elif encoding == "deflate":
+                    body = zlib.decompress(body)
+                intake._record(json.loads(body or b"{}"))
+                if intake.latency_s:
+                    time.sleep(intake.latency_s)
+
+                reply = b'{"errors": []}'
+                self.send_response(202)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-datadog", daemon=True)
+
+    def _record(self, payload: dict):
+        series = payload.get("series", [])
+        with self._lock:
+            self.payloads += 1
+            self.series += len(series)
+            self.points += sum(len(s.get("points", [])) for s in series)
+
+    def start(self) -> "FakeDatadogIntake":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def attach(self, metrics):
+        """Point a DatadogMetrics instance (created with dummy DD keys) at this server"""
+        from datadog_api_client import ApiClient
+        from datadog_api_client.v1.api.metrics_api import MetricsApi
+
+        metrics.configuration.host = self.url
+        metrics.api_client = ApiClient(metrics.configuration)
+        metrics.metrics_api = MetricsApi(metrics.api_client)
@@ -0,0 +1,187 @@
+"""
+HealthBot Monitor - Benchmark Suite
+Runs the app in-process against a fake Gemini client and a local Datadog
+intake, drives /chat, /dashboard, /metrics and /alerts at each concurrency
+level (throughput, p50/p99), then micro-benchmarks the metrics hot paths
+and response-model serialization.
+
+Run from the backend directory:
+    python -m benchmarks.suite --latency-ms 200 --error-rate 0.01 --levels 1 16 64
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure the app before it is imported: dummy Datadog keys so metrics are
+# shipped (to the local intake), no per-client rate limits, only error logs
+os.environ.setdefault("DD_API_KEY", "benchmark")
+os.environ.setdefault("DD_APP_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("GEMINI_LOCAL_TOKENIZER", "false")
+
+import httpx
+
+from benchmarks.stubs import FakeDatadogIntake, FakeGeminiClient
+from datadog_config import datadog_metrics
+from gemini_service import gemini_service
+from main import app, get_dashboard_data, get_metrics
+from models import ChatResponse, DashboardData, HealthMetrics
+
+ENDPOINTS = {
+    "chat": ("POST", "/chat"),
+    "chat_stream": ("POST", "/chat/stream"),
+    "dashboard": ("GET", "/dashboard"),
+    "metrics": ("GET", "/metrics"),
+    "alerts": ("GET", "/alerts"),
+}
+
+# Numbers every chat message, so no two requests in a run share a message
+_message_ids = itertools.count()
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def _request(client: httpx.AsyncClient, endpoint: str) -> int:
+    method, path = ENDPOINTS[endpoint]
+    if method == "GET":
+        response = await client.get(path)
+        return response.status_code
+    # Distinct messages, so the response cache and coalescing don't answer them
+    body = {"message": f"What helps with a cold? (benchmark {next(_message_ids)})"}
+    if endpoint == "chat_stream":
+        async with client.stream(method, path, json=body) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+    response = await client.request(method, path, json=body)
+    return response.status_code
+
+
+async def run_level(client: httpx.AsyncClient, endpoint: str, concurrency: int, total: int) -> dict:
+    """Send `total` requests with `concurrency` workers; latency is per request"""
+    latencies = []
+    statuses = {}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await _request(client, endpoint)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": total / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "statuses": statuses,
+    }
+
+
+async def load(endpoints: list, levels: list, total: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'endpoint':>12} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}  status")
+        for endpoint in endpoints:
+            for concurrency in levels:
+                result = await run_level(client, endpoint, concurrency, total)
+                statuses = " ".join(f"{code}x{count}" for code, count in sorted(result["statuses"].items()))
+                print(
+                    f"{endpoint:>12} {concurrency:>5} {result['throughput']:>9.1f} "
+                    f"{result['p50']:>9.2f} {result['p99']:>9.2f}  {statuses}"
+                )
+
+
+def _time_us(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def micro(iterations: int):
+    metrics_model = asyncio.run(get_metrics())
+    dashboard_model = asyncio.run(get_dashboard_data(history_range="15m", step="10s"))
+    chat_model = ChatResponse(
+        response=FakeGeminiClient().answer, conversation_id="conv_benchmark",
+        tokens_used=160, response_time_ms=812.4, timestamp=datetime.utcnow()
+    )
+    metrics_data = metrics_model.model_dump()
+    dashboard_data = dashboard_model.model_dump()
+
+    cases = {
+        "track_request": lambda: datadog_metrics.track_request(812.4, 160, endpoint="benchmark"),
+        "get_metrics_summary": datadog_metrics.get_metrics_summary,
+        "ChatResponse json": chat_model.model_dump_json,
+        "HealthMetrics validate+json": lambda: HealthMetrics.model_validate(metrics_data).model_dump_json(),
+        "DashboardData validate+json": lambda: DashboardData.model_validate(dashboard_data).model_dump_json(),
+    }
+    print(f"{'micro-benchmark':>28} {'µs/op':>10}")
+    for name, fn in cases.items():
+        print(f"{name:>28} {_time_us(fn, iterations):>10.2f}")
+
+
+def main(args):
+    intake = FakeDatadogIntake(latency_ms=args.datadog_latency_ms).start()
+    intake.attach(datadog_metrics)
+    gemini_service.client = FakeGeminiClient(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks, chunk_interval_ms=args.chunk_interval_ms, seed=1
+    )
+    print(
+        f"fake Gemini: {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, error rate {args.error_rate:.1%}; "
+        f"{args.requests} requests per level"
+    )
+
+    try:
+        if not args.skip_load:
+            asyncio.run(load(args.endpoints, args.levels, args.requests))
+            print()
+        if not args.skip_micro:
+            micro(args.iterations)
+    finally:
+        datadog_metrics.shipper.flush()
+        client = gemini_service.client
+        print(
+            f"\nGemini calls: {client.calls} ({client.errors} injected errors); "
+            f"Datadog intake: {intake.payloads} payloads, {intake.points} points"
+        )
+        datadog_metrics.shutdown()
+        intake.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS),
+                        default=["chat", "dashboard", "metrics", "alerts"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=256, help="Requests per endpoint and level")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Fake Gemini latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Gemini calls failing with 503")
+    parser.add_argument("--stream-chunks", type=int, default=8)
+    parser.add_argument("--chunk-interval-ms", type=float, default=20)
+    parser.add_argument("--datadog-latency-ms", type=float, default=0, help="Fake Datadog intake latency")
+    parser.add_argument("--iterations", type=int, default=2000, help="Micro-benchmark iterations")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+
+    main(parser.parse_args())
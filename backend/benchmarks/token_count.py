@@ -0,0 +1,87 @@
+"""
+HealthBot Monitor - Token Counting Benchmark
+Times TokenCounter on messages up to ChatRequest's 2000-char limit, both
+uncached (distinct strings) and cached (repeated strings), and compares
+counts with the old len(text) // 4 guess.
+
+The estimate is the default backend. --local-tokenizer times Gemini's local
+tokenizer instead and fails if it can't be loaded, so a missing model file
+is never reported as the tokenizer meeting the budget. For English the
+estimate equals len // 4; better counts there need the tokenizer.
+
+Run from the backend directory:
+    python -m benchmarks.token_count
+    python -m benchmarks.token_count --local-tokenizer
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_counter import TokenCounter
+
+BUDGET_US = 100.0
+MAX_MESSAGE_CHARS = 2000
+
+SAMPLES = {
+    "english": (
+        "I've had a persistent headache for three days, with nausea and some "
+        "sensitivity to light. Ibuprofen 400mg helps for a few hours. "
+    ),
+    "markdown": (
+        "## Possible causes\n- **Tension headache**: stress, poor sleep\n"
+        "- **Migraine** (with `aura`?)\n| Symptom | Action |\n|---|---|\n"
+    ),
+    "german": "Ich habe seit drei Tagen Kopfschmerzen, Übelkeit und Lichtempfindlichkeit. ",
+    "chinese": "我头痛三天了，伴有恶心和畏光，吃了布洛芬只能缓解几个小时。",
+}
+
+
+def _message(sample: str, i: int) -> str:
+    """A distinct 2000-char message, so the LRU cache can't answer it"""
+    prefix = f"[{i}] "
+    body = sample * (MAX_MESSAGE_CHARS // len(sample) + 1)
+    return (prefix + body)[:MAX_MESSAGE_CHARS]
+
+
+def _time_us(counter: TokenCounter, messages: list) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        counter.count(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def main(iterations: int, local_tokenizer: bool):
+    counter = TokenCounter("gemini-2.5-flash", cache_size=iterations)
+    if local_tokenizer and not counter.load():
+        print("local tokenizer could not be loaded (needs sentencepiece, protobuf and its model file)")
+        return False
+    print(f"backend: {counter.backend}, {MAX_MESSAGE_CHARS}-char messages, {iterations} per sample")
+    print(f"{'sample':>10} {'tokens':>8} {'len//4':>8} {'uncached µs':>12} {'cached µs':>10}")
+
+    worst = 0.0
+    for name, sample in SAMPLES.items():
+        messages = [_message(sample, i) for i in range(iterations)]
+        uncached = _time_us(counter, messages)
+        cached = _time_us(counter, messages)
+        worst = max(worst, uncached)
+        print(
+            f"{name:>10} {counter.count(messages[0]):>8} {len(messages[0]) // 4:>8} "
+            f"{uncached:>12.1f} {cached:>10.2f}"
+        )
+
+    verdict = "OK" if worst < BUDGET_US else "OVER BUDGET"
+    print(f"worst uncached: {worst:.1f} µs (budget {BUDGET_US:.0f} µs) {verdict}")
+    return worst < BUDGET_US
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--local-tokenizer", action="store_true",
+                        help="Time Gemini's local tokenizer instead of the estimate")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.iterations, args.local_tokenizer) else 1)
@@ -0,0 +1,182 @@
+"""
+HealthBot Monitor - Conversation Store
+Bounded in-memory multi-turn history for Gemini conversations
+"""
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+
+@dataclass
+class Turn:
+    """One message in a conversation"""
+    role: str  # "user" or "model", as Gemini expects
+    text: str
+    tokens: int
+    seq: int = 0
+
+
+@dataclass
+class Conversation:
+    """Turns of a single conversation plus bookkeeping for eviction"""
+    turns: Deque[Turn] = field(default_factory=deque)
+    summary: Optional[str] = None  # Stands in for turns that were compacted away
+    summary_tokens: int = 0
+    tokens: int = 0
+    size_bytes: int = 0
+    next_seq: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class ConversationStore:
+    """
+    Per-conversation turn lists under three bounds
+    - each conversation keeps at most `max_tokens_per_conversation`
+      (oldest turns are dropped first)
+    - conversations idle for `ttl_seconds` expire
+    - at most `max_conversations` / `max_total_bytes` overall, evicting the
+      least recently active conversation first
+    """
+    
+    def __init__(self, max_tokens_per_conversation: int = 4000, ttl_seconds: float = 1800,
+                 max_conversations: int = 10000, max_total_bytes: int = 64 * 1024 * 1024):
+        self.max_tokens_per_conversation = max_tokens_per_conversation
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self.max_total_bytes = max_total_bytes
+        
+        self.total_bytes = 0
+        self.evicted_conversations = 0
+        self.trimmed_turns = 0
+        
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._conversations)
+    
+    def __contains__(self, conversation_id: Optional[str]) -> bool:
+        return self._get(conversation_id) is not None
+    
+    def _get(self, conversation_id: Optional[str]) -> Optional[Conversation]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        if time.monotonic() - conversation.last_active > self.ttl_seconds:
+            self._remove(conversation_id)
+            return None
+        return conversation
+    
+    def _remove(self, conversation_id: str):
+        conversation = self._conversations.pop(conversation_id)
+        self.total_bytes -= conversation.size_bytes
+    
+    def _expire(self):
+        """Drop idle conversations (oldest activity is at the front)"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._conversations:
+            conversation_id, conversation = next(iter(self._conversations.items()))
+            if conversation.last_active > cutoff:
+                break
+            self._remove(conversation_id)
+            self.evicted_conversations += 1
+    
+    def get_turns(self, conversation_id: Optional[str]) -> List[Turn]:
+        """History of a conversation, oldest first (empty if unknown or expired)"""
+        conversation = self._get(conversation_id)
+        return list(conversation.turns) if conversation else []
+    
+    def append(self, conversation_id: str, role: str, text: str, tokens: int):
+        """Add a turn, then enforce the per-conversation and global bounds"""
+        conversation = self._get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = Conversation()
+        
+        turn = Turn(role=role, text=text, tokens=tokens, seq=conversation.next_seq)
+        conversation.next_seq += 1
+        size = len(text.encode())
+        conversation.turns.append(turn)
+        conversation.tokens += tokens
+        conversation.size_bytes += size
+        conversation.last_active = time.monotonic()
+        self.total_bytes += size
+        self._conversations.move_to_end(conversation_id)
+        
+        # Keep within the token budget, but never drop the newest turn, and
+        # keep history starting on a user turn as Gemini expects
+        while len(conversation.turns) > 1 and (
+            conversation.tokens > self.max_tokens_per_conversation
+            or conversation.turns[0].role != "user"
+        ):
+            self._pop_oldest(conversation)
+            self.trimmed_turns += 1
+        
+        self._expire()
+        while len(self._conversations) > 1 and (
+            len(self._conversations) > self.max_conversations
+            or self.total_bytes > self.max_total_bytes
+        ):
+            self._remove(next(iter(self._conversations)))
+            self.evicted_conversations += 1
+    
+    def get_summary(self, conversation_id: Optional[str]) -> Optional[str]:
+        """Summary of compacted turns, if the conversation has one"""
+        conversation = self._get(conversation_id)
+        return conversation.summary if conversation else None
+    
+    def get_tokens(self, conversation_id: Optional[str]) -> int:
+        """Estimated tokens of the history that would be sent with the next turn"""
+        conversation = self._get(conversation_id)
+        return conversation.tokens if conversation else 0
+    
+    def compact(self, conversation_id: str, summary: str, summary_tokens: int, up_to_seq: int) -> int:
+        """
+        Replace turns with seq <= `up_to_seq` (and any earlier summary) by `summary`
+        
+        Turns added while the summary was being produced are kept.
+        Returns the number of turns removed.
+        """
+        conversation = self._get(conversation_id)
+        if conversation is None:
+            return 0
+        
+        removed = 0
+        while conversation.turns and conversation.turns[0].seq <= up_to_seq:
+            self._pop_oldest(conversation)
+            removed += 1
+        # Keep history starting on a user turn
+        while len(conversation.turns) > 1 and conversation.turns[0].role != "user":
+            self._pop_oldest(conversation)
+            removed += 1
+        
+        old_size = len(conversation.summary.encode()) if conversation.summary else 0
+        new_size = len(summary.encode())
+        conversation.tokens += summary_tokens - conversation.summary_tokens
+        conversation.size_bytes += new_size - old_size
+        self.total_bytes += new_size - old_size
+        conversation.summary = summary
+        conversation.summary_tokens = summary_tokens
+        return removed
+    
+    def _pop_oldest(self, conversation: Conversation):
+        oldest = conversation.turns.popleft()
+        size = len(oldest.text.encode())
+        conversation.tokens -= oldest.tokens
+        conversation.size_bytes -= size
+        self.total_bytes -= size
+    
+    def clear(self, conversation_id: str) -> bool:
+        """Forget a conversation; returns False if it was not stored"""
+        if self._get(conversation_id) is None:
+            return False
+        self._remove(conversation_id)
+        return True
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "conversations": len(self),
+            "total_bytes": self.total_bytes,
+            "evicted_conversations": self.evicted_conversations,
+            "trimmed_turns": self.trimmed_turns
+        }
@@ -0,0 +1,147 @@
+"""
+HealthBot Monitor - Live Dashboard Stream
+Computes one dashboard snapshot per tick and fans it out to every
+subscriber as server-sent events: a full snapshot on connect, then deltas.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+HISTORY_SERIES = ("response_time_history", "error_rate_history", "token_usage_history")
+
+
+def _sse_frame(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _changed(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys of `current` whose values differ from `previous`"""
+    return {key: value for key, value in current.items() if previous.get(key) != value}
+
+
+def diff_snapshots(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Delta between two dashboard snapshots
+    
+    Counters are sent only when they changed; history series only carry
+    new points and the still-filling latest step; alerts are resent whole
+    when the set changes.
+    """
+    delta: Dict[str, Any] = {}
+    
+    metrics = _changed(previous["metrics"], current["metrics"])
+    metrics.pop("last_updated", None)
+    if metrics:
+        delta["metrics"] = metrics
+    
+    windows = {
+        name: changed
+        for name, window in current["windows"].items()
+        if (changed := _changed(previous["windows"].get(name, {}), window))
+    }
+    if windows:
+        delta["windows"] = windows
+    
+    for series in HISTORY_SERIES:
+        seen = {point["timestamp"]: point["value"] for point in previous[series]}
+        points = [
+            point for point in current[series]
+            if seen.get(point["timestamp"]) != point["value"]
+        ]
+        if points:
+            delta[series] = points
+    
+    alerts = [(a["id"], a["status"], a["message"]) for a in current["recent_alerts"]]
+    if alerts != [(a["id"], a["status"], a["message"]) for a in previous["recent_alerts"]]:
+        delta["recent_alerts"] = current["recent_alerts"]
+    
+    return delta
+
+
+class DashboardBroadcaster:
+    """
+    Shared producer for /dashboard/stream
+    A single ticker task runs while anyone is subscribed. Each tick builds
+    the snapshot once, encodes the delta frame once and hands the same
+    string to every subscriber queue.
+    """
+    
+    def __init__(self, build_snapshot: Callable[[], Dict[str, Any]],
+                 interval_seconds: float = 5.0, max_pending_frames: int = 8):
+        self.build_snapshot = build_snapshot
+        self.interval = interval_seconds
+        self.max_pending_frames = max_pending_frames
+        
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_frame: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def _refresh(self) -> Optional[str]:
+        """Build a new snapshot and return the encoded delta frame (if any)"""
+        snapshot = self.build_snapshot()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self._snapshot_frame = _sse_frame("snapshot", snapshot)
+        
+        if previous is None:
+            return None
+        delta = diff_snapshots(previous, snapshot)
+        return _sse_frame("delta", delta) if delta else ": keepalive\n\n"
+    
+    def _publish(self, frame: str):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow client - drop its backlog and resync with a full snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_frame)
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                frame = self._refresh()
+            except Exception as e:
+                logger.error("Dashboard snapshot failed", error=str(e))
+                continue
+            if frame:
+                self._publish(frame)
+    
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield SSE frames for one client: a snapshot, then deltas"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_frames)
+        
+        if self._snapshot_frame is None:
+            self._refresh()
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        
+        try:
+            yield self._snapshot_frame
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                self.stop()
+    
+    def stop(self):
+        """Stop the ticker; the next subscriber starts from a fresh snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._snapshot = None
+        self._snapshot_frame = None
@@ -3,12 +3,21 @@ HealthBot Monitor - Datadog Integration
 Complete observability with APM, metrics, and logging
 """
 import os
+import glob
+import json
 import time
+import shutil
+import tempfile
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from functools import wraps
 import structlog
 
+from aggregates import FixedHistogram, LatencySketch
+from log_pipeline import configure_from_env
+from metrics_store import create_metrics_store, pid_running
 from datadog_api_client import ApiClient, Configuration
 from datadog_api_client.v1.api.metrics_api import MetricsApi
 from datadog_api_client.v1.api.monitors_api import MonitorsApi
@@ -20,27 +29,282 @@ from datadog_api_client.v1.model.monitor_type import MonitorType
 from datadog_api_client.v1.model.monitor_options import MonitorOptions
 from datadog_api_client.v1.model.monitor_thresholds import MonitorThresholds
 
-# Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
-)
+# Configure structured logging (sampled, rendered and written off the request path)
+log_pipeline = configure_from_env()
 
 logger = structlog.get_logger(__name__)
 
+# Rolling windows reported on /dashboard; alerts use ALERT_WINDOW to match
+# the avg(last_5m) monitors created by setup_default_alerts
+ROLLING_WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+ALERT_WINDOW = "5m"
+
+
+# (metric_name, value, tags, unix_timestamp)
+MetricPoint = Tuple[str, float, Tuple[str, ...], int]
+
+
+class MetricShipper:
+    """
+    Background metric shipping pipeline
+    Queues points in-process and hands them to `submit` in batches from a
+    worker thread, either every `flush_interval_ms` or as soon as
+    `max_batch_points` are waiting, so callers never wait on the network.
+    """
+    
+    def __init__(self, submit: Callable[[List[MetricPoint]], None],
+                 flush_interval_ms: int = 1000, max_batch_points: int = 500,
+                 max_queue_points: int = 10000):
+        self.submit = submit
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_points = max_batch_points
+        self.max_queue_points = max_queue_points
+        
+        self.dropped_points = 0
+        self.batches_sent = 0
+        
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+    
+    def enqueue(self, point: MetricPoint):
+        """Queue a point for the next flush (never blocks on I/O)"""
+        with self._condition:
+            if len(self._queue) >= self.max_queue_points:
+                # Shed the oldest point rather than grow without bound
+                self._queue.popleft()
+                self.dropped_points += 1
+            self._queue.append(point)
+            
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(
+                    target=self._run, name="datadog-metric-shipper", daemon=True
+                )
+                self._thread.start()
+            
+            if len(self._queue) >= self.max_batch_points:
+                self._condition.notify()
+    
+    def pending(self) -> int:
+        """Number of points waiting to be shipped"""
+        return len(self._queue)
+    
+    def _drain(self) -> List[MetricPoint]:
+        """Pop up to one batch of points (caller holds the lock)"""
+        count = min(len(self._queue), self.max_batch_points)
+        return [self._queue.popleft() for _ in range(count)]
+    
+    def _submit(self, batch: List[MetricPoint]):
+        try:
+            self.submit(batch)
+            self.batches_sent += 1
+        except Exception as e:
+            logger.error("Metric batch submission failed", points=len(batch), error=str(e))
+    
+    def _run(self):
+        """Worker loop: wait for a full batch or the flush interval, then ship"""
+        while True:
+            with self._condition:
+                if not self._stopped and len(self._queue) < self.max_batch_points:
+                    self._condition.wait(self.flush_interval)
+                batch = self._drain()
+                stopped = self._stopped
+            
+            if batch:
+                self._submit(batch)
+            elif stopped:
+                return
+    
+    def flush(self):
+        """Synchronously ship everything currently queued"""
+        while True:
+            with self._condition:
+                batch = self._drain()
+            if not batch:
+                return
+            self._submit(batch)
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the worker after it has shipped the remaining points"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+class MetricBuffer:
+    """
+    Bounded buffer for metrics that could not be shipped
+    Holds at most `max_points` in memory as a ring. When it overflows the
+    oldest points are appended to an on-disk spill segment (if a
+    `spill_path` is set) instead of being dropped, and `take` hands back
+    the oldest points first - spilled ones before in-memory ones - so a
+    backlog can be replayed in batches once Datadog accepts data again.
+    
+    Each process needs its own segment: a "{pid}" in `spill_path` is
+    replaced by the process id, and segments left by processes that are
+    no longer running are adopted on startup so their points still ship.
+    """
+    
+    def __init__(self, max_points: int = 10000, spill_path: Optional[str] = None,
+                 spill_max_bytes: int = 50 * 1024 * 1024):
+        self.max_points = max_points
+        self.spill_path = spill_path.replace("{pid}", str(os.getpid())) if spill_path else None
+        self.spill_max_bytes = spill_max_bytes
+        
+        self.dropped_points = 0
+        self.spilled_points = 0
+        
+        self._points: deque = deque()
+        self._lock = threading.Lock()
+        self._spill_pending = 0
+        self._spill_offset = 0
+        self._spill_size = 0
+        
+        if spill_path and "{pid}" in spill_path:
+            self._adopt_orphans(spill_path)
+        if self.spill_path and os.path.exists(self.spill_path):
+            self._recover_spill()
+    
+    def __len__(self) -> int:
+        return len(self._points) + self._spill_pending
+    
+    def _adopt_orphans(self, template: str):
+        """Append segments of exited processes to this process' segment"""
+        prefix, _, suffix = template.partition("{pid}")
+        for path in glob.glob(glob.escape(prefix) + "*" + glob.escape(suffix)):
+            pid = path[len(prefix):len(path) - len(suffix)]
+            if not pid.isdigit() or path == self.spill_path or pid_running(int(pid)):
+                continue
+            # Renaming claims the segment, so only one worker adopts it
+            claimed = f"{self.spill_path}.adopting"
+            try:
+                os.rename(path, claimed)
+                with open(claimed, "rb") as src, open(self.spill_path, "ab") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(claimed)
+            except OSError as e:
+                logger.warning("Failed to adopt spilled metrics", path=path, error=str(e))
+    
+    def _recover_spill(self):
+        """Pick up a segment left behind by a previous process"""
+        with open(self.spill_path, "rb") as f:
+            self._spill_pending = sum(1 for _ in f)
+            self._spill_size = f.tell()
+        if self._spill_pending:
+            logger.info("Recovered spilled metrics", points=self._spill_pending)
+    
+    def append(self, point: MetricPoint):
+        self.extend([point])
+    
+    def extend(self, points: List[MetricPoint]):
+        """Buffer points, spilling the oldest ones once the ring is full"""
+        with self._lock:
+            self._points.extend(points)
+            overflow = len(self._points) - self.max_points
+            if overflow > 0:
+                self._spill([self._points.popleft() for _ in range(overflow)])
+    
+    def _spill(self, points: List[MetricPoint]):
+        """Append evicted points to the spill segment, or count them as dropped"""
+        if not self.spill_path:
+            self.dropped_points += len(points)
+            return
+        
+        lines = "".join(
+            json.dumps([name, value, list(tags), timestamp]) + "\n"
+            for name, value, tags, timestamp in points
+        ).encode()
+        if self._spill_size + len(lines) > self.spill_max_bytes:
+            self.dropped_points += len(points)
+            return
+        
+        try:
+            with open(self.spill_path, "ab") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.error("Failed to spill metrics to disk", path=self.spill_path, error=str(e))
+            self.dropped_points += len(points)
+            return
+        
+        self._spill_size += len(lines)
+        self._spill_pending += len(points)
+        self.spilled_points += len(points)
+    
+    def _take_spilled(self, limit: int) -> List[MetricPoint]:
+        """Read the next `limit` points from the spill segment"""
+        points = []
+        consumed = 0
+        try:
+            with open(self.spill_path, "rb") as f:
+                f.seek(self._spill_offset)
+                while consumed < limit:
+                    line = f.readline()
+                    if not line:
+                        break
+                    consumed += 1
+                    try:
+                        name, value, tags, timestamp = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash - skip the line
+                        self.dropped_points += 1
+                        continue
+                    points.append((name, value, tuple(tags), timestamp))
+                self._spill_offset = f.tell()
+                # Only the unreplayed tail counts against spill_max_bytes
+                self._spill_size = f.seek(0, os.SEEK_END) - self._spill_offset
+        except OSError as e:
+            logger.error("Failed to read spilled metrics", path=self.spill_path, error=str(e))
+            self.dropped_points += self._spill_pending
+            consumed = self._spill_pending
+        
+        self._spill_pending -= consumed
+        if self._spill_pending <= 0 or not consumed:
+            # Segment fully replayed - start a fresh one
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self._spill_pending = self._spill_offset = self._spill_size = 0
+        elif self._spill_offset > self._spill_size:
+            self._compact_spill()
+        return points
+    
+    def _compact_spill(self):
+        """Drop the replayed head of the segment so the file stays bounded too"""
+        compacted = f"{self.spill_path}.compact"
+        try:
+            with open(self.spill_path, "rb") as src, open(compacted, "wb") as dst:
+                src.seek(self._spill_offset)
+                shutil.copyfileobj(src, dst)
+            os.replace(compacted, self.spill_path)
+        except OSError as e:
+            logger.warning("Failed to compact spilled metrics", path=self.spill_path, error=str(e))
+            return
+        self._spill_offset = 0
+    
+    def take(self, limit: int) -> List[MetricPoint]:
+        """Remove and return up to `limit` of the oldest buffered points"""
+        with self._lock:
+            points = []
+            if self._spill_pending:
+                points = self._take_spilled(limit)
+            while self._points and len(points) < limit:
+                points.append(self._points.popleft())
+            return points
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self),
+            "in_memory": len(self._points),
+            "on_disk": self._spill_pending,
+            "spilled_total": self.spilled_points,
+            "dropped": self.dropped_points
+        }
+
 
 class DatadogMetrics:
     """
@@ -56,18 +320,59 @@ class DatadogMetrics:
         self.env = os.getenv("DD_ENV", "development")
         
         # Initialize metrics storage (in-memory for demo)
-        self.metrics_buffer: list = []
-        self.request_count = 0
-        self.error_count = 0
-        self.total_tokens = 0
-        self.response_times: list = []
+        # Spilling to disk only helps when Datadog may come back, so mock
+        # mode keeps a plain bounded ring
+        self.metrics_buffer = MetricBuffer(
+            max_points=int(os.getenv("DD_BUFFER_MAX_POINTS", "10000")),
+            spill_path=os.getenv(
+                "DD_BUFFER_SPILL_PATH",
+                os.path.join(tempfile.gettempdir(), "healthbot_metrics_spill.{pid}.jsonl")
+            ) if self.is_connected() else None,
+            spill_max_bytes=int(os.getenv("DD_BUFFER_SPILL_MAX_BYTES", str(50 * 1024 * 1024)))
+        )
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        self.admission_rejections: Dict[str, int] = {}
+        self.rate_limit_rejections: Dict[str, int] = {}
+        self.coalesced_requests = 0
+        self.prompt_turns = 0
+        self.prompt_tokens_total = 0
+        self.cached_prompt_tokens_total = 0
+        self.last_prompt_tokens = 0
+        # Per-model call stats, used to tune routing between model tiers
+        self.model_stats: Dict[str, Dict[str, Any]] = {}
+        # Per-route HTTP stats recorded by TimingMiddleware
+        self.http_stats: Dict[str, Dict[str, Any]] = {}
+        self.http_in_flight = 0
+        # Request counters, latency sketch and time-bucketed history tiers
+        # (the first tier backs "last N minutes" views and alerts; coarser
+        # tiers back longer dashboard ranges), per process or shared by workers
+        self.store = create_metrics_store([
+            (
+                int(os.getenv("METRICS_WINDOW_RETENTION_SECONDS", "3600")),
+                int(os.getenv("METRICS_WINDOW_RESOLUTION_SECONDS", "1"))
+            ),
+            (6 * 3600, 10),
+            (24 * 3600, 60),
+        ])
         self.start_time = time.time()
         
         # Configure Datadog client
         self.configuration = None
+        self.api_client = None
         self.metrics_api = None
         self._initialize_client()
         
+        # Per-request metrics are pushed to Datadog in batches off the request
+        # path; with DD_PUSH_METRICS=false only the local aggregates are kept
+        # (served on /metrics and /metrics/prometheus for scrapers)
+        self.push_metrics = os.getenv("DD_PUSH_METRICS", "true").lower() == "true"
+        self.shipper = MetricShipper(
+            submit=self._submit_batch,
+            flush_interval_ms=int(os.getenv("DD_FLUSH_INTERVAL_MS", "1000")),
+            max_batch_points=int(os.getenv("DD_FLUSH_MAX_POINTS", "500")),
+            max_queue_points=int(os.getenv("DD_MAX_QUEUED_POINTS", "10000"))
+        )
+        
         logger.info("DatadogMetrics initialized", service=self.service, env=self.env)
     
     def _initialize_client(self):
@@ -79,6 +384,10 @@ class DatadogMetrics:
                 "appKeyAuth": self.app_key
             }
             self.configuration.server_variables["site"] = self.site
+            
+            # One long-lived client so batches reuse the same HTTP connection
+            self.api_client = ApiClient(self.configuration)
+            self.metrics_api = MetricsApi(self.api_client)
             logger.info("Datadog client configured successfully")
         else:
             logger.warning("Datadog API keys not configured - running in mock mode")
@@ -91,7 +400,8 @@ class DatadogMetrics:
         """Get current Unix timestamp"""
         return int(datetime.utcnow().timestamp())
     
-    def _create_series(self, metric_name: str, value: float, tags: list = None) -> Series:
+    def _create_series(self, metric_name: str, points: List[Tuple[int, float]],
+                       tags: list = None) -> Series:
         """Create a Datadog metric series"""
         if tags is None:
             tags = []
@@ -101,113 +411,375 @@ class DatadogMetrics:
             f"env:{self.env}",
             "source:healthbot"
         ]
-        all_tags = default_tags + tags
+        all_tags = default_tags + list(tags)
         
         return Series(
             metric=f"healthbot.{metric_name}",
             type="gauge",
-            points=[Point([self._get_current_timestamp(), value])],
+            points=[Point([timestamp, value]) for timestamp, value in points],
             tags=all_tags
         )
     
+    def _post_points(self, batch: List[MetricPoint]):
+        """Merge points into multi-point series and submit them as one payload"""
+        grouped: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[int, float]]] = {}
+        for metric_name, value, tags, timestamp in batch:
+            grouped.setdefault((metric_name, tags), []).append((timestamp, value))
+        
+        series = [
+            self._create_series(metric_name, points, tags)
+            for (metric_name, tags), points in grouped.items()
+        ]
+        self.metrics_api.submit_metrics(body=MetricsPayload(series=series))
+        logger.debug("Metric batch sent to Datadog", points=len(batch), series=len(series))
+    
+    def _submit_batch(self, batch: List[MetricPoint]):
+        """Ship a batch, buffering it on failure and replaying the backlog on success"""
+        try:
+            self._post_points(batch)
+        except Exception as e:
+            logger.error("Failed to send metric batch to Datadog",
+                        points=len(batch), error=str(e))
+            # Buffer the metrics for retry
+            self.metrics_buffer.extend(batch)
+            return
+        
+        if len(self.metrics_buffer):
+            self._replay_buffer()
+    
+    def _replay_buffer(self):
+        """Submit buffered points in batches until the backlog is empty"""
+        replayed = 0
+        while True:
+            batch = self.metrics_buffer.take(self.shipper.max_batch_points)
+            if not batch:
+                break
+            try:
+                self._post_points(batch)
+            except Exception as e:
+                logger.error("Metric backlog replay interrupted", error=str(e))
+                self.metrics_buffer.extend(batch)
+                break
+            replayed += len(batch)
+        
+        if replayed:
+            logger.info("Replayed buffered metrics", points=replayed,
+                        remaining=len(self.metrics_buffer))
+    
     def send_metric(self, metric_name: str, value: float, tags: list = None):
-        """Send a custom metric to Datadog"""
+        """Queue a custom metric for background shipping to Datadog"""
+        if not self.push_metrics:
+            return
+        
+        point = (metric_name, float(value), tuple(tags or ()), self._get_current_timestamp())
+        
         if not self.is_connected():
             # Store locally if not connected
-            self.metrics_buffer.append({
-                "name": metric_name,
-                "value": value,
-                "tags": tags,
-                "timestamp": datetime.utcnow().isoformat()
-            })
+            self.metrics_buffer.append(point)
             logger.debug("Metric buffered (Datadog not connected)", 
                         metric=metric_name, value=value)
             return
         
-        try:
-            with ApiClient(self.configuration) as api_client:
-                metrics_api = MetricsApi(api_client)
-                series = self._create_series(metric_name, value, tags)
-                payload = MetricsPayload(series=[series])
-                metrics_api.submit_metrics(body=payload)
-                
-            logger.info("Metric sent to Datadog", metric=metric_name, value=value)
-        except Exception as e:
-            logger.error("Failed to send metric to Datadog", 
-                        metric=metric_name, error=str(e))
-            # Buffer the metric for retry
-            self.metrics_buffer.append({
-                "name": metric_name,
-                "value": value,
-                "tags": tags,
-                "timestamp": datetime.utcnow().isoformat()
-            })
+        self.shipper.enqueue(point)
+    
+    def shutdown(self):
+        """Ship any queued metrics and release the Datadog connection"""
+        self.shipper.shutdown()
+        if self.api_client is not None:
+            self.api_client.close()
+    
+    @property
+    def request_count(self) -> int:
+        return self.store.totals()[0]
+    
+    @property
+    def error_count(self) -> int:
+        return self.store.totals()[1]
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.store.totals()[2]
     
     def track_request(self, response_time_ms: float, tokens_used: int, 
-                     success: bool = True, error_type: str = None):
+                     success: bool = True, error_type: str = None,
+                     time_to_first_token_ms: float = None, endpoint: str = "chat"):
         """Track a chat request with all metrics"""
-        self.request_count += 1
-        self.response_times.append(response_time_ms)
+        self.store.record(time.time(), response_time_ms, tokens=tokens_used, error=not success)
+        request_count, error_count, _ = self.store.totals()
         
-        if success:
-            self.total_tokens += tokens_used
-        else:
-            self.error_count += 1
+        if self.push_metrics:
+            # Send metrics to Datadog
+            tags = [f"endpoint:{endpoint}"]
+            if error_type:
+                tags.append(f"error_type:{error_type}")
+            
+            # Response time metric
+            self.send_metric("response_time_ms", response_time_ms, tags)
+            
+            # Time to first token (streaming requests only)
+            if time_to_first_token_ms is not None:
+                self.send_metric("time_to_first_token_ms", time_to_first_token_ms, tags)
+            
+            # Token usage metric
+            if tokens_used > 0:
+                self.send_metric("tokens_used", float(tokens_used), tags)
+            
+            # Request count
+            self.send_metric("request_count", float(request_count), tags)
+            
+            # Error tracking
+            if not success:
+                self.send_metric("error_count", float(error_count), 
+                               tags + [f"error:{error_type or 'unknown'}"])
+            
+            # Calculate and send error rate
+            error_rate = (error_count / request_count * 100) if request_count > 0 else 0
+            self.send_metric("error_rate", error_rate, tags)
         
-        # Send metrics to Datadog
-        tags = ["endpoint:chat"]
-        if error_type:
-            tags.append(f"error_type:{error_type}")
+        logger.info("Request tracked",
+                   response_time_ms=response_time_ms,
+                   tokens_used=tokens_used,
+                   success=success,
+                   total_requests=request_count)
+    
+    def track_cache_lookup(self, cache: str, hit: bool, tokens_saved: int = 0,
+                           lookup_ms: float = None):
+        """Track a cache lookup (hit or miss), the tokens a hit saved and its latency"""
+        stats = self.cache_stats.setdefault(cache, {"hits": 0, "misses": 0, "tokens_saved": 0})
+        tags = [f"cache:{cache}"]
         
-        # Response time metric
-        self.send_metric("response_time_ms", response_time_ms, tags)
+        if lookup_ms is not None:
+            self.send_metric("cache_lookup_ms", lookup_ms, tags)
         
-        # Token usage metric
-        if tokens_used > 0:
-            self.send_metric("tokens_used", float(tokens_used), tags)
+        if hit:
+            stats["hits"] += 1
+            stats["tokens_saved"] += tokens_saved
+            self.send_metric("cache_hits", float(stats["hits"]), tags)
+            if tokens_saved:
+                self.send_metric("cache_tokens_saved", float(tokens_saved), tags)
+        else:
+            stats["misses"] += 1
+            self.send_metric("cache_misses", float(stats["misses"]), tags)
+    
+    def track_admission(self, wait_ms: Optional[float], queue_depth: int, in_flight: int,
+                        rejected: str = None):
+        """Track an admission decision for an upstream Gemini call"""
+        tags = ["upstream:gemini"]
+        self.send_metric("admission_queue_depth", float(queue_depth), tags)
+        self.send_metric("admission_in_flight", float(in_flight), tags)
         
-        # Request count
-        self.send_metric("request_count", float(self.request_count), tags)
+        if rejected:
+            count = self.admission_rejections.get(rejected, 0) + 1
+            self.admission_rejections[rejected] = count
+            self.send_metric("admission_rejections", float(count), tags + [f"reason:{rejected}"])
+        elif wait_ms is not None:
+            self.send_metric("admission_wait_ms", wait_ms, tags)
+    
+    def track_rate_limit(self, scope: str):
+        """Track a request refused by the rate limiter"""
+        count = self.rate_limit_rejections.get(scope, 0) + 1
+        self.rate_limit_rejections[scope] = count
+        self.send_metric("rate_limit_rejections", float(count), [f"scope:{scope}"])
+    
+    def track_coalesced_request(self):
+        """Track a request that shared an identical upstream call already in flight"""
+        self.coalesced_requests += 1
+        self.send_metric("coalesced_requests", float(self.coalesced_requests), ["upstream:gemini"])
+    
+    def track_prompt_tokens(self, prompt_tokens: int, cached_tokens: int = 0):
+        """Track the prompt size sent to Gemini for one turn, split by cache status"""
+        self.prompt_turns += 1
+        self.prompt_tokens_total += prompt_tokens
+        self.cached_prompt_tokens_total += cached_tokens
+        self.last_prompt_tokens = prompt_tokens
         
-        # Error tracking
-        if not success:
-            self.send_metric("error_count", float(self.error_count), 
-                           tags + [f"error:{error_type or 'unknown'}"])
+        tags = ["endpoint:chat"]
+        self.send_metric("prompt_tokens", float(prompt_tokens), tags)
+        self.send_metric("prompt_tokens_cached", float(cached_tokens), tags)
+        self.send_metric("prompt_tokens_uncached", float(prompt_tokens - cached_tokens), tags)
+    
+    def track_model_call(self, model: str, latency_ms: float, tokens_used: int = 0,
+                         success: bool = True, error_type: str = None, fallback: bool = False):
+        """Track one upstream call to a specific model (including failed attempts)"""
+        stats = self.model_stats.get(model)
+        if stats is None:
+            stats = self.model_stats[model] = {
+                "requests": 0, "errors": 0, "fallbacks": 0, "tokens": 0,
+                "sketch": LatencySketch(), "histogram": FixedHistogram()
+            }
+        stats["requests"] += 1
+        stats["sketch"].add(latency_ms)
+        stats["histogram"].observe(latency_ms)
         
-        # Calculate and send error rate
-        error_rate = (self.error_count / self.request_count * 100) if self.request_count > 0 else 0
-        self.send_metric("error_rate", error_rate, tags)
+        tags = [f"model:{model}"]
+        self.send_metric("model.response_time", latency_ms, tags)
         
-        logger.info("Request tracked",
-                   response_time_ms=response_time_ms,
-                   tokens_used=tokens_used,
-                   success=success,
-                   total_requests=self.request_count)
+        if success:
+            stats["tokens"] += tokens_used
+            self.send_metric("model.tokens_used", float(tokens_used), tags)
+            if fallback:
+                stats["fallbacks"] += 1
+                self.send_metric("model.fallbacks", float(stats["fallbacks"]), tags)
+        else:
+            stats["errors"] += 1
+            self.send_metric("model.errors", float(stats["errors"]),
+                             tags + [f"error_type:{error_type or 'unknown'}"])
+    
+    def track_http_start(self):
+        """Count a request entering the app (in-flight gauge)"""
+        self.http_in_flight += 1
+    
+    def track_http_request(self, route: str, method: str, status: int, latency_ms: float,
+                           request_bytes: int = 0, response_bytes: int = 0):
+        """Track one HTTP request from TimingMiddleware once its response is complete"""
+        self.http_in_flight -= 1
+        key = f"{method} {route}"
+        stats = self.http_stats.get(key)
+        if stats is None:
+            stats = self.http_stats[key] = {
+                "route": route, "method": method,
+                "requests": 0, "request_bytes": 0, "response_bytes": 0,
+                "status": {}, "sketch": LatencySketch(), "histogram": FixedHistogram()
+            }
+        stats["requests"] += 1
+        stats["request_bytes"] += request_bytes
+        stats["response_bytes"] += response_bytes
+        stats["status"][status] = count = stats["status"].get(status, 0) + 1
+        stats["sketch"].add(latency_ms)
+        stats["histogram"].observe(latency_ms)
+        
+        if not self.push_metrics:
+            return
+        tags = [f"route:{route}", f"method:{method}"]
+        self.send_metric("http.request.duration", latency_ms, tags + [f"status_class:{status // 100}xx"])
+        self.send_metric("http.request.bytes", float(request_bytes), tags)
+        self.send_metric("http.response.bytes", float(response_bytes), tags)
+        self.send_metric("http.responses", float(count), tags + [f"status:{status}"])
+        self.send_metric("http.in_flight", float(self.http_in_flight))
+    
+    def get_http_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Latency, status and byte stats per route"""
+        summaries = {}
+        for key, stats in self.http_stats.items():
+            latency = stats["sketch"].summary()
+            summaries[key] = {
+                "requests": stats["requests"],
+                "status_codes": {str(code): count for code, count in sorted(stats["status"].items())},
+                "request_bytes": stats["request_bytes"],
+                "response_bytes": stats["response_bytes"],
+                "average_response_time_ms": round(latency["avg"], 2),
+                "p50_response_time_ms": round(latency["p50"], 2),
+                "p99_response_time_ms": round(latency["p99"], 2)
+            }
+        return summaries
+    
+    def get_model_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Latency, error and token stats per model"""
+        summaries = {}
+        for model, stats in self.model_stats.items():
+            latency = stats["sketch"].summary()
+            summaries[model] = {
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "error_rate_percent": round(stats["errors"] / stats["requests"] * 100, 2),
+                "fallbacks_served": stats["fallbacks"],
+                "tokens_used": stats["tokens"],
+                "average_response_time_ms": round(latency["avg"], 2),
+                "p50_response_time_ms": round(latency["p50"], 2),
+                "p99_response_time_ms": round(latency["p99"], 2)
+            }
+        return summaries
     
     def get_metrics_summary(self) -> Dict[str, Any]:
-        """Get summary of all tracked metrics"""
-        avg_response_time = (sum(self.response_times) / len(self.response_times)) \
-            if self.response_times else 0
+        """
+        Get summary of all tracked metrics
+        
+        Called for /metrics, /dashboard and every stream tick, so it reads
+        one latency sketch and plain counters only; the per-model and
+        per-route breakdowns (a sketch walk each) are served on /stats.
+        
+        Request counts, latency and tokens come from the metrics store and
+        cover `scope` ("host" for the shared store, summed over every worker
+        on this host); everything under "worker" belongs to this process only.
+        """
+        latency = self.store.latency_summary()
+        request_count, error_count, total_tokens = self.store.totals()
         
         return {
-            "total_requests": self.request_count,
-            "successful_requests": self.request_count - self.error_count,
-            "failed_requests": self.error_count,
-            "average_response_time_ms": round(avg_response_time, 2),
-            "total_tokens_used": self.total_tokens,
-            "uptime_seconds": round(time.time() - self.start_time, 2),
+            "scope": self.store.scope,
+            "total_requests": request_count,
+            "successful_requests": request_count - error_count,
+            "failed_requests": error_count,
+            "average_response_time_ms": round(latency["avg"], 2),
+            "p50_response_time_ms": round(latency["p50"], 2),
+            "p90_response_time_ms": round(latency["p90"], 2),
+            "p99_response_time_ms": round(latency["p99"], 2),
+            "max_response_time_ms": round(latency["max"], 2),
+            "total_tokens_used": total_tokens,
             "error_rate_percent": round(
-                (self.error_count / self.request_count * 100) if self.request_count > 0 else 0, 2
+                (error_count / request_count * 100) if request_count > 0 else 0, 2
             ),
-            "buffered_metrics": len(self.metrics_buffer)
+            "worker": {
+                "pid": os.getpid(),
+                "uptime_seconds": round(time.time() - self.start_time, 2),
+                "average_prompt_tokens": round(
+                    self.prompt_tokens_total / self.prompt_turns if self.prompt_turns else 0, 2
+                ),
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens_total,
+                "uncached_prompt_tokens": self.prompt_tokens_total - self.cached_prompt_tokens_total,
+                "buffered_metrics": len(self.metrics_buffer),
+                "cache": self.cache_stats,
+                "admission_rejections": self.admission_rejections,
+                "rate_limit_rejections": self.rate_limit_rejections,
+                "coalesced_requests": self.coalesced_requests,
+                "http_in_flight": self.http_in_flight
+            }
         }
     
-    def get_response_time_history(self, limit: int = 50) -> list:
-        """Get recent response time history"""
-        return self.response_times[-limit:]
+    def get_window_summary(self, window: str) -> Dict[str, Any]:
+        """Get latency, error rate and token rate over a rolling window (e.g. "5m")"""
+        return self.store.query(0, ROLLING_WINDOWS[window], now=time.time())
+    
+    def get_window_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Get every rolling window reported on the dashboard"""
+        now = time.time()
+        return {
+            name: self.store.query(0, seconds, now=now)
+            for name, seconds in ROLLING_WINDOWS.items()
+        }
+    
+    def get_history(self, range_seconds: int, step_seconds: int) -> list:
+        """
+        Get downsampled latency, error rate and token history
+        
+        Reads from the coarsest tier whose resolution divides `step_seconds`
+        and whose retention covers `range_seconds`, so the cost tracks the
+        number of points returned rather than the amount of history kept.
+        
+        Returns:
+            List of dicts with timestamp, request_count, average_response_time_ms,
+            error_rate_percent and tokens_used (steps without traffic omitted)
+        """
+        candidates = [
+            index for index, (retention, resolution) in enumerate(self.store.tier_specs)
+            if step_seconds % resolution == 0
+            and retention // resolution * resolution >= range_seconds
+        ]
+        if not candidates:
+            raise ValueError(
+                f"No history tier covers range={range_seconds}s at step={step_seconds}s"
+            )
+        tier = max(candidates, key=lambda index: self.store.tier_specs[index][1])
+        
+        now = time.time()
+        return self.store.series(tier, now - range_seconds, now, step_seconds)
     
     def log_event(self, event_name: str, data: Dict[str, Any] = None):
-        """Log a custom event"""
+        """Log a custom event (high-volume events may be sampled, see LOG_SAMPLE_RATES)"""
+        if not log_pipeline.sampler.keep(event_name):
+            return
+        
         log_data = {
             "event_name": event_name,
             "service": self.service,
@@ -217,7 +789,8 @@ class DatadogMetrics:
         if data:
             log_data.update(data)
         
-        logger.info(msg=event_name, **log_data)
+        # event stays null as before; the name is in msg/event_name
+        logger.info(None, msg=event_name, **log_data)
     
     def create_monitor(self, name: str, query: str, message: str, 
                        threshold_critical: float, threshold_warning: float = None) -> Optional[Dict]:
@@ -326,41 +899,72 @@ class DatadogMetrics:
         logger.info("Default alerts setup complete", monitors_created=len(created_monitors))
         return created_monitors
     
-    def get_alerts_status(self) -> list:
-        """Get local alert status based on current metrics"""
-        summary = self.get_metrics_summary()
+    def get_alerts_status(self, window: Dict[str, Any] = None) -> list:
+        """
+        Get local alert status based on recent metrics (same window as the monitors)
+        
+        Args:
+            window: Precomputed ALERT_WINDOW summary, to avoid aggregating twice
+        """
+        if window is None:
+            window = self.get_window_summary(ALERT_WINDOW)
         alerts = []
         
+        if window["request_count"] == 0:
+            return alerts
+        
         # Check response time
-        if summary["average_response_time_ms"] > 5000:
+        if window["average_response_time_ms"] > 5000:
             alerts.append({
                 "type": "critical",
                 "name": "High Response Time",
-                "message": f"Average response time is {summary['average_response_time_ms']:.0f}ms (> 5000ms)",
-                "value": summary["average_response_time_ms"]
+                "message": f"Average response time over the last {ALERT_WINDOW} is {window['average_response_time_ms']:.0f}ms (> 5000ms)",
+                "value": window["average_response_time_ms"],
+                "window": ALERT_WINDOW
             })
-        elif summary["average_response_time_ms"] > 3000:
+        elif window["average_response_time_ms"] > 3000:
             alerts.append({
                 "type": "warning",
                 "name": "Elevated Response Time",
-                "message": f"Average response time is {summary['average_response_time_ms']:.0f}ms (> 3000ms)",
-                "value": summary["average_response_time_ms"]
+                "message": f"Average response time over the last {ALERT_WINDOW} is {window['average_response_time_ms']:.0f}ms (> 3000ms)",
+                "value": window["average_response_time_ms"],
+                "window": ALERT_WINDOW
             })
         
         # Check error rate
-        if summary["error_rate_percent"] > 5:
+        if window["error_rate_percent"] > 5:
             alerts.append({
                 "type": "critical",
                 "name": "High Error Rate",
-                "message": f"Error rate is {summary['error_rate_percent']:.1f}% (> 5%)",
-                "value": summary["error_rate_percent"]
+                "message": f"Error rate over the last {ALERT_WINDOW} is {window['error_rate_percent']:.1f}% (> 5%)",
+                "value": window["error_rate_percent"],
+                "window": ALERT_WINDOW
             })
-        elif summary["error_rate_percent"] > 2:
+        elif window["error_rate_percent"] > 2:
             alerts.append({
                 "type": "warning",
                 "name": "Elevated Error Rate",
-                "message": f"Error rate is {summary['error_rate_percent']:.1f}% (> 2%)",
-                "value": summary["error_rate_percent"]
+                "message": f"Error rate over the last {ALERT_WINDOW} is {window['error_rate_percent']:.1f}% (> 2%)",
+                "value": window["error_rate_percent"],
+                "window": ALERT_WINDOW
+            })
+        
+        # Check token usage
+        if window["average_tokens_per_request"] > 10000:
+            alerts.append({
+                "type": "critical",
+                "name": "Token Usage Spike",
+                "message": f"Average tokens per request over the last {ALERT_WINDOW} is {window['average_tokens_per_request']:.0f} (> 10000)",
+                "value": window["average_tokens_per_request"],
+                "window": ALERT_WINDOW
+            })
+        elif window["average_tokens_per_request"] > 5000:
+            alerts.append({
+                "type": "warning",
+                "name": "Elevated Token Usage",
+                "message": f"Average tokens per request over the last {ALERT_WINDOW} is {window['average_tokens_per_request']:.0f} (> 5000)",
+                "value": window["average_tokens_per_request"],
+                "window": ALERT_WINDOW
             })
         
         return alerts
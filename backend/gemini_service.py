@@ -4,13 +4,30 @@ Google Gemini integration for health-related queries using google.genai
 """
 import os
 import time
-from typing import Optional, Tuple
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import structlog
 
 # Use the new google.genai library
 from google import genai
 from google.genai import types
 
+from admission import AdmissionController, AdmissionRejected
+from model_router import ModelRouter, ModelTier
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, is_retryable
+from datadog_config import datadog_metrics
+from conversation_store import ConversationStore
+from response_cache import ResponseCache, normalize_message
+from token_counter import TokenCounter
+
+# Optional: semantic cache needs NumPy
+try:
+    from semantic_cache import HashingEmbedder, SemanticCache
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
 logger = structlog.get_logger(__name__)
 
 
@@ -38,6 +55,20 @@ HEALTH_SYSTEM_PROMPT = """You are HealthBot, a helpful AI health assistant. Your
 Start each response helpfully and end with appropriate caveats when discussing serious health topics."""
 
 
+# Refresh the explicit context cache this long before it expires
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 60
+
+
+# Prompt used to compact older conversation turns into a running summary
+CONVERSATION_SUMMARY_PROMPT = """Summarize this conversation between a user and HealthBot, an AI health assistant, in at most 150 words. Keep every symptom, condition, medication, measurement and piece of advice that was mentioned, and the user's open questions. Write plain prose without greetings or disclaimers.
+
+Earlier summary:
+{previous}
+
+Conversation:
+{transcript}"""
+
+
 class GeminiService:
     """
     Google Gemini AI Service
@@ -47,8 +78,110 @@ class GeminiService:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.client = None
-        self.model_name = "gemini-2.5-flash"  # Latest Gemini 2.5 model
-        self.conversations = {}  # Store conversation history
+        # Short FAQ-like questions go to a cheaper tier; each tier is the other's fallback
+        self.router = ModelRouter(
+            standard=ModelTier(
+                "standard",
+                os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+                int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "1024"))
+            ),
+            fast=ModelTier(
+                "fast",
+                os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash-lite"),
+                int(os.getenv("GEMINI_FAST_MAX_OUTPUT_TOKENS", "512"))
+            ),
+            short_message_chars=int(os.getenv("GEMINI_FAST_MAX_MESSAGE_CHARS", "160")),
+            fallback_enabled=os.getenv("GEMINI_FALLBACK_ENABLED", "true").lower() == "true"
+        )
+        self.model_name = self.router.standard.model
+        
+        # Local token counts for prompt budgets and usage metrics
+        self.token_counter = TokenCounter(
+            self.model_name, cache_size=int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+        )
+        # Oldest history turns are left out of a prompt that would exceed this
+        self.max_prompt_tokens = int(os.getenv("GEMINI_MAX_PROMPT_TOKENS", "8000"))
+        # A primary with a fallback behind it gets short attempts and fewer
+        # retries (but at least one) before failing over
+        self.fallback_after_seconds = float(os.getenv("GEMINI_FALLBACK_AFTER_SECONDS", "10"))
+        self.retries_before_fallback = max(1, int(os.getenv("GEMINI_RETRIES_BEFORE_FALLBACK", "1")))
+        # Store conversation history
+        self.conversations = ConversationStore(
+            max_tokens_per_conversation=int(os.getenv("CONVERSATION_MAX_TOKENS", "4000")),
+            ttl_seconds=float(os.getenv("CONVERSATION_TTL_SECONDS", "1800")),
+            max_conversations=int(os.getenv("CONVERSATION_MAX_COUNT", "10000")),
+            max_total_bytes=int(os.getenv("CONVERSATION_MAX_TOTAL_BYTES", str(64 * 1024 * 1024)))
+        )
+        
+        # Cache for answers to context-free questions
+        self.response_cache = ResponseCache(
+            max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+            enabled=os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        )
+        # Caps concurrent upstream calls; excess requests queue briefly or are rejected
+        self.admission = AdmissionController(
+            max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", "16")),
+            max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "64")),
+            queue_timeout_seconds=float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "10"))
+        )
+        
+        # Timeouts, retries, optional hedging and a circuit breaker per model
+        hedge_after_ms = os.getenv("GEMINI_HEDGE_AFTER_MS")
+        self.upstreams: Dict[str, ResilientCaller] = {
+            tier.model: ResilientCaller(
+                CircuitBreaker(
+                    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5")),
+                    recovery_seconds=float(os.getenv("GEMINI_BREAKER_RECOVERY_SECONDS", "30"))
+                ),
+                timeout_seconds=float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30")),
+                max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+                base_delay_seconds=float(os.getenv("GEMINI_RETRY_BASE_DELAY_MS", "200")) / 1000,
+                max_delay_seconds=float(os.getenv("GEMINI_RETRY_MAX_DELAY_MS", "2000")) / 1000,
+                hedge_after_seconds=float(hedge_after_ms) / 1000 if hedge_after_ms else None
+            )
+            for tier in self.router.tiers
+        }
+        
+        # Older turns are compacted into a summary once a conversation grows past this
+        self.summary_threshold_tokens = int(os.getenv("CONVERSATION_SUMMARY_THRESHOLD_TOKENS", "1500"))
+        self.summary_keep_turns = int(os.getenv("CONVERSATION_SUMMARY_KEEP_TURNS", "4"))
+        self._compacting: set = set()
+        self._background_tasks: set = set()
+        # Single-flight upstream calls by cache key
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        
+        # Built once per tier; the system prompt travels as a system instruction
+        self.generation_configs = {
+            tier.name: self._build_generation_config(max_output_tokens=tier.max_output_tokens)
+            for tier in self.router.tiers
+        }
+        self.generation_config = self.generation_configs["standard"]
+        self.summary_config = types.GenerateContentConfig(temperature=0.2, max_output_tokens=256)
+        self._config_fingerprints = {
+            name: config.model_dump_json(exclude_none=True)
+            for name, config in self.generation_configs.items()
+        }
+        
+        # Optional explicit context caching of the system prompt (cached content is per model)
+        self.context_cache_enabled = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "false").lower() == "true"
+        self.context_cache_ttl_seconds = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+        self._context_caches: Dict[str, Tuple[Optional[str], float]] = {}
+        self._context_cache_lock = asyncio.Lock()
+        
+        # Optional near-duplicate stage behind the exact-match cache
+        self.semantic_cache = None
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true":
+            if SEMANTIC_CACHE_AVAILABLE:
+                self.semantic_cache = SemanticCache(
+                    HashingEmbedder(dim=int(os.getenv("SEMANTIC_CACHE_DIM", "512"))),
+                    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000")),
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+                    ttl_seconds=self.response_cache.ttl_seconds
+                )
+            else:
+                logger.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed")
         
         self._initialize()
     
@@ -73,14 +206,334 @@ class GeminiService:
         return self.client is not None
     
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)"""
-        # Roughly 4 characters per token for English
-        return len(text) // 4
+        """Local token count (Gemini's tokenizer when loaded, else a script-aware estimate)"""
+        return self.token_counter.count(text)
+    
+    def _build_prompt(self, message: str, summary: Optional[str] = None) -> str:
+        """User turn for Gemini: conversation summary (if any) and the question"""
+        context = f"Summary of the conversation so far: {summary}\n\n" if summary else ""
+        return f"{context}User's health question: {message}"
+    
+    def _build_contents(self, message: str, conversation_id: Optional[str]):
+        """Prompt for Gemini: earlier turns of the conversation, then this question"""
+        turns = self.conversations.get_turns(conversation_id)
+        prompt = self._build_prompt(message, self.conversations.get_summary(conversation_id))
+        if not turns:
+            return prompt
+        
+        # Enforce the prompt budget before calling the API: keep the newest turns that fit
+        budget = (
+            self.max_prompt_tokens
+            - self._estimate_tokens(HEALTH_SYSTEM_PROMPT)
+            - self._estimate_tokens(prompt)
+        )
+        first = len(turns)
+        while first and turns[first - 1].tokens <= budget:
+            budget -= turns[first - 1].tokens
+            first -= 1
+        turns = turns[first:]
+        # History must start with a user turn
+        while turns and turns[0].role != "user":
+            turns = turns[1:]
+        if not turns:
+            return prompt
+        
+        contents = [
+            types.Content(role=turn.role, parts=[types.Part(text=turn.text)])
+            for turn in turns
+        ]
+        contents.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
+        return contents
+    
+    def _estimate_prompt_tokens(self, message: str, conversation_id: Optional[str]) -> int:
+        """Estimated prompt size: system prompt, history (incl. summary) and message"""
+        return (
+            self._estimate_tokens(HEALTH_SYSTEM_PROMPT)
+            + self.conversations.get_tokens(conversation_id)
+            + self._estimate_tokens(message)
+        )
+    
+    def _track_prompt_tokens(self, estimate: int, response=None):
+        """Report the prompt size of a turn and how much of it was served from cache"""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+        cached_tokens = getattr(usage, "cached_content_token_count", None) if usage else None
+        datadog_metrics.track_prompt_tokens(prompt_tokens or estimate, cached_tokens or 0)
+    
+    def _remember_turn(self, conversation_id: Optional[str], message: str, response_text: str):
+        """Append a completed question/answer pair to the conversation history"""
+        if not conversation_id or not response_text:
+            return
+        self.conversations.append(conversation_id, "user", message, self._estimate_tokens(message))
+        self.conversations.append(
+            conversation_id, "model", response_text, self._estimate_tokens(response_text)
+        )
+        self._maybe_compact(conversation_id)
+    
+    def _maybe_compact(self, conversation_id: str):
+        """Schedule background summarization once a conversation passes the threshold"""
+        if not self.is_connected() or conversation_id in self._compacting:
+            return
+        if self.conversations.get_tokens(conversation_id) <= self.summary_threshold_tokens:
+            return
+        
+        turns = self.conversations.get_turns(conversation_id)
+        older = turns[:max(0, len(turns) - self.summary_keep_turns)]
+        # End on a model turn so the kept history still starts with the user
+        if older and older[-1].role == "user":
+            older = older[:-1]
+        if len(older) < 2:
+            return
+        
+        self._compacting.add(conversation_id)
+        task = asyncio.create_task(self._compact_conversation(conversation_id, older))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _compact_conversation(self, conversation_id: str, turns: list):
+        """Summarize `turns` (plus any earlier summary) off the request path"""
+        try:
+            transcript = "\n".join(
+                f"{'User' if turn.role == 'user' else 'HealthBot'}: {turn.text}"
+                for turn in turns
+            )
+            prompt = CONVERSATION_SUMMARY_PROMPT.format(
+                previous=self.conversations.get_summary(conversation_id) or "(none)",
+                transcript=transcript
+            )
+            # Summaries are background work, so they go to the cheaper tier
+            async with self._admitted():
+                response, _ = await self._call_with_fallback(
+                    [self.router.fast, self.router.standard], prompt, lambda tier: self.summary_config
+                )
+            summary = (response.text or "").strip()
+            if not summary:
+                return
+            
+            removed = self.conversations.compact(
+                conversation_id, summary, self._estimate_tokens(summary), turns[-1].seq
+            )
+            logger.info(
+                "Conversation compacted",
+                conversation_id=conversation_id,
+                turns_removed=removed,
+                history_tokens=self.conversations.get_tokens(conversation_id)
+            )
+        except Exception as e:
+            logger.warning("Conversation compaction failed", conversation_id=conversation_id, error=str(e))
+        finally:
+            self._compacting.discard(conversation_id)
+    
+    @asynccontextmanager
+    async def _admitted(self):
+        """Hold an admission slot around an upstream Gemini call"""
+        try:
+            wait_ms = await self.admission.acquire()
+        except AdmissionRejected as e:
+            datadog_metrics.track_admission(
+                wait_ms=None, queue_depth=self.admission.waiting,
+                in_flight=self.admission.in_flight, rejected=e.reason
+            )
+            logger.warning("Gemini request rejected", reason=e.reason, retry_after=e.retry_after)
+            raise
+        
+        datadog_metrics.track_admission(
+            wait_ms=wait_ms, queue_depth=self.admission.waiting,
+            in_flight=self.admission.in_flight
+        )
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.admission.release(time.monotonic() - start)
+    
+    def _build_generation_config(self, **overrides) -> types.GenerateContentConfig:
+        """Generation settings shared by the blocking and streaming paths"""
+        settings = dict(
+            system_instruction=HEALTH_SYSTEM_PROMPT,
+            temperature=0.7,
+            top_p=0.9,
+            top_k=40,
+            max_output_tokens=1024,
+        )
+        settings.update(overrides)
+        return types.GenerateContentConfig(**settings)
+    
+    async def _get_generation_config(self, tier: ModelTier) -> types.GenerateContentConfig:
+        """Config for the next call: the cached-content variant while a context cache is live"""
+        config = self.generation_configs[tier.name]
+        if not self.context_cache_enabled:
+            return config
+        
+        _, expires_at = self._context_caches.get(tier.model, (None, 0.0))
+        if expires_at - time.time() < CONTEXT_CACHE_REFRESH_MARGIN_SECONDS:
+            async with self._context_cache_lock:
+                _, expires_at = self._context_caches.get(tier.model, (None, 0.0))
+                if expires_at - time.time() < CONTEXT_CACHE_REFRESH_MARGIN_SECONDS:
+                    await self._create_context_cache(tier.model)
+        
+        cache_name, _ = self._context_caches[tier.model]
+        if cache_name is None:
+            return config
+        # A request may not set system_instruction and cached_content together
+        return config.model_copy(update={"system_instruction": None, "cached_content": cache_name})
+    
+    async def _create_context_cache(self, model: str):
+        """Upload the system prompt as explicit cached content (falls back silently)"""
+        try:
+            cache = await self.client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name="healthbot-system-prompt",
+                    system_instruction=HEALTH_SYSTEM_PROMPT,
+                    ttl=f"{self.context_cache_ttl_seconds}s"
+                )
+            )
+            self._context_caches[model] = (cache.name, time.time() + self.context_cache_ttl_seconds)
+            logger.info("Gemini context cache created", model=model, cache=cache.name)
+        except Exception as e:
+            # e.g. the prompt is below the model's minimum cacheable size;
+            # fall back to system_instruction and retry after a TTL
+            logger.warning("Gemini context cache unavailable", model=model, error=str(e))
+            self._context_caches[model] = (None, time.time() + self.context_cache_ttl_seconds)
+    
+    def _route(self, message: str, conversation_id: Optional[str]) -> List[ModelTier]:
+        """Model tiers to try for this turn, primary first"""
+        has_history = bool(conversation_id) and (
+            bool(self.conversations.get_turns(conversation_id))
+            or self.conversations.get_summary(conversation_id) is not None
+        )
+        return self.router.route(message, has_history)
+    
+    @staticmethod
+    def _should_fall_back(error: Exception) -> bool:
+        """Slow, rate-limited, failing or breaker-open models hand over to the next tier"""
+        return isinstance(error, CircuitOpenError) or is_retryable(error)
+    
+    async def _call_with_fallback(self, tiers: List[ModelTier], contents, get_config=None):
+        """
+        Call the first healthy tier, failing over on transient errors
+        
+        Returns:
+            Tuple of (response, tier that answered)
+        """
+        for index, tier in enumerate(tiers):
+            upstream = self.upstreams[tier.model]
+            has_fallback = index + 1 < len(tiers)
+            config = get_config(tier) if get_config else await self._get_generation_config(tier)
+            start = time.monotonic()
+            try:
+                response = await upstream.call(
+                    lambda: self.client.aio.models.generate_content(
+                        model=tier.model,
+                        contents=contents,
+                        config=config
+                    ),
+                    max_retries=min(self.retries_before_fallback, upstream.max_retries)
+                    if has_fallback else None,
+                    timeout_seconds=self.fallback_after_seconds if has_fallback else None
+                )
+            except Exception as e:
+                datadog_metrics.track_model_call(
+                    tier.model, (time.monotonic() - start) * 1000,
+                    success=False, error_type=type(e).__name__
+                )
+                if has_fallback and self._should_fall_back(e):
+                    logger.warning("Falling back to next model", model=tier.model,
+                                   fallback=tiers[index + 1].model, error=str(e) or type(e).__name__)
+                    continue
+                raise
+            
+            usage = getattr(response, "usage_metadata", None)
+            datadog_metrics.track_model_call(
+                tier.model, (time.monotonic() - start) * 1000,
+                tokens_used=getattr(usage, "total_token_count", None) or 0 if usage else 0,
+                fallback=index > 0
+            )
+            return response, tier
+    
+    def _cache_key(self, message: str, tier: ModelTier) -> Tuple[str, str, str]:
+        """
+        Cache key: normalized message plus everything that shapes the answer
+        
+        `tier` is the primary the question is routed to; answers from a
+        fallback tier are not cached under it (see _store_cache).
+        """
+        return (tier.model, self._config_fingerprints[tier.name], normalize_message(message))
+    
+    def _lookup_cache(self, message: str, conversation_id: Optional[str],
+                      use_cache: bool) -> Tuple[Optional[Tuple], Any, Optional[Any]]:
+        """
+        Check the exact and (if enabled) semantic caches for a context-free question
+        
+        Returns:
+            Tuple of (cache_key, embedding, cached_entry); the key is None
+            when the request must not be cached, the embedding None unless
+            the semantic stage ran, the entry None on a miss
+        """
+        if not (use_cache and self.response_cache.enabled):
+            return None, None, None
+        # Answers that depend on earlier turns are never shared
+        if conversation_id in self.conversations:
+            return None, None, None
+        
+        key = self._cache_key(message, self._route(message, conversation_id)[0])
+        cached = self.response_cache.get(key)
+        datadog_metrics.track_cache_lookup(
+            "response", hit=cached is not None,
+            tokens_saved=cached.tokens if cached else 0
+        )
+        if cached is not None or self.semantic_cache is None:
+            return key, None, cached
+        
+        lookup_start = time.perf_counter()
+        embedding = self.semantic_cache.embed(message)
+        # Near-duplicates only share answers from the same model and config
+        cached = self.semantic_cache.get(embedding, key[:2])
+        datadog_metrics.track_cache_lookup(
+            "semantic", hit=cached is not None,
+            tokens_saved=cached.tokens if cached else 0,
+            lookup_ms=(time.perf_counter() - lookup_start) * 1000
+        )
+        if cached is not None:
+            # Promote so the exact phrasing hits the cheaper stage next time
+            self.response_cache.put(key, cached.text, cached.tokens)
+        return key, embedding, cached
+    
+    def _store_cache(self, cache_key: Optional[Tuple], embedding, text: str, tokens: int,
+                     fallback: bool = False):
+        """
+        Remember a fresh answer in every cache stage the lookup went through
+        
+        Fallback answers come from a different model and config than the key
+        describes, so they are served once but never cached.
+        """
+        if cache_key is None or not text or fallback:
+            return
+        self.response_cache.put(cache_key, text, tokens)
+        if embedding is not None:
+            self.semantic_cache.put(embedding, cache_key[:2], text, tokens)
+    
+    def _count_tokens(self, message: str, response_text: str, response=None) -> int:
+        """Total tokens for a turn, preferring Gemini's usage metadata"""
+        # Estimate tokens (input + output)
+        input_tokens = self._estimate_tokens(message)
+        output_tokens = self._estimate_tokens(response_text)
+        total_tokens = input_tokens + output_tokens
+        
+        # Try to get actual token count if available
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            prompt_tokens = getattr(response.usage_metadata, 'prompt_token_count', None) or input_tokens
+            candidate_tokens = getattr(response.usage_metadata, 'candidates_token_count', None) or output_tokens
+            total_tokens = prompt_tokens + candidate_tokens
+        
+        return total_tokens
     
     async def generate_response(
         self, 
         message: str, 
-        conversation_id: Optional[str] = None
+        conversation_id: Optional[str] = None,
+        use_cache: bool = True
     ) -> Tuple[str, int, float]:
         """
         Generate a health-related response using Gemini
@@ -88,12 +541,25 @@ class GeminiService:
         Args:
             message: User's health query
             conversation_id: Optional conversation ID for context
+            use_cache: Allow answering from / storing into the response cache
+            
+        Raises:
+            AdmissionRejected: Too many upstream calls are already queued,
+                or the circuit breaker is open
             
         Returns:
             Tuple of (response_text, tokens_used, response_time_ms)
+            (tokens_used is 0 when the answer came from the cache or
+            from an identical call already in flight)
         """
         start_time = time.time()
         
+        cache_key, embedding, cached = self._lookup_cache(message, conversation_id, use_cache)
+        if cached is not None:
+            logger.info("Response served from cache", conversation_id=conversation_id)
+            self._remember_turn(conversation_id, message, cached.text)
+            return cached.text, 0, (time.time() - start_time) * 1000
+        
         if not self.is_connected():
             return (
                 "I'm sorry, but the AI service is currently unavailable. "
@@ -102,21 +568,72 @@ class GeminiService:
                 (time.time() - start_time) * 1000
             )
         
+        # Identical context-free questions already on their way upstream share
+        # that call instead of starting their own (single-flight)
+        flight_key = (
+            self._cache_key(message, self._route(message, conversation_id)[0])
+            if use_cache and conversation_id not in self.conversations else None
+        )
+        if flight_key is None:
+            response_text, total_tokens, answered = await self._generate_uncached(
+                message, conversation_id, cache_key, embedding
+            )
+        else:
+            flight = self._in_flight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = asyncio.ensure_future(
+                    self._generate_uncached(message, conversation_id, cache_key, embedding)
+                )
+                self._in_flight[flight_key] = flight
+                flight.add_done_callback(lambda task: self._finish_flight(flight_key, task))
+            else:
+                datadog_metrics.track_coalesced_request()
+                logger.info("Request coalesced with in-flight call", conversation_id=conversation_id)
+            
+            # Shielded so one caller going away doesn't cancel the call others are awaiting
+            response_text, total_tokens, answered = await asyncio.shield(flight)
+            if not leader:
+                # Only the caller that started the call is charged for it
+                total_tokens = 0
+        
+        if answered:
+            self._remember_turn(conversation_id, message, response_text)
+        return response_text, total_tokens, (time.time() - start_time) * 1000
+    
+    def _finish_flight(self, flight_key: Tuple, task: asyncio.Future):
+        """Forget a completed single-flight call"""
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+    
+    async def _generate_uncached(
+        self,
+        message: str,
+        conversation_id: Optional[str],
+        cache_key: Optional[Tuple],
+        embedding
+    ) -> Tuple[str, int, bool]:
+        """
+        Call Gemini for one turn and fill the response cache
+        
+        Returns:
+            Tuple of (response_text, tokens_used, answered); answered is False
+            when response_text is the apology for a failed call
+        """
+        start_time = time.time()
+        
         try:
-            # Combine system prompt with user message
-            full_prompt = f"{HEALTH_SYSTEM_PROMPT}\n\nUser's health question: {message}\n\nYour helpful response:"
-            
-            # Generate response using the new API
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=full_prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    top_p=0.9,
-                    top_k=40,
-                    max_output_tokens=1024,
+            # Generate response using the async client so the event loop
+            # stays free while Gemini is working
+            prompt_estimate = self._estimate_prompt_tokens(message, conversation_id)
+            tiers = self._route(message, conversation_id)
+            async with self._admitted():
+                response, tier = await self._call_with_fallback(
+                    tiers, self._build_contents(message, conversation_id)
                 )
-            )
             
             # Extract response text
             response_text = response.text
@@ -124,30 +641,28 @@ class GeminiService:
             # Calculate metrics
             response_time_ms = (time.time() - start_time) * 1000
             
-            # Estimate tokens (input + output)
-            input_tokens = self._estimate_tokens(message)
-            output_tokens = self._estimate_tokens(response_text)
-            total_tokens = input_tokens + output_tokens
+            total_tokens = self._count_tokens(message, response_text, response)
+            self._track_prompt_tokens(prompt_estimate, response)
             
-            # Try to get actual token count if available
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                prompt_tokens = getattr(response.usage_metadata, 'prompt_token_count', None) or input_tokens
-                candidate_tokens = getattr(response.usage_metadata, 'candidates_token_count', None) or output_tokens
-                total_tokens = prompt_tokens + candidate_tokens
+            self._store_cache(cache_key, embedding, response_text, total_tokens,
+                              fallback=tier is not tiers[0])
             
             logger.info(
                 "Generated health response",
                 conversation_id=conversation_id,
+                model=tier.model,
                 input_length=len(message),
                 output_length=len(response_text),
                 tokens=total_tokens,
                 response_time_ms=round(response_time_ms, 2)
             )
             
-            return response_text, total_tokens, response_time_ms
+            return response_text, total_tokens, True
             
+        except AdmissionRejected:
+            # Surfaced to the API layer as 429/503 with Retry-After
+            raise
         except Exception as e:
-            response_time_ms = (time.time() - start_time) * 1000
             logger.error("Error generating response", error=str(e))
             
             # Return user-friendly error message
@@ -157,12 +672,172 @@ class GeminiService:
                 "Please try rephrasing your question or try again later."
             )
             
-            return error_response, 0, response_time_ms
+            return error_response, 0, False
+    
+    async def stream_response(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a health-related response from Gemini as it is generated
+        
+        Args:
+            message: User's health query
+            conversation_id: Optional conversation ID for context
+            use_cache: Allow answering from / storing into the response cache
+            
+        Yields:
+            {"type": "token", "text": ...} for each chunk, then a single
+            {"type": "done", ...} or {"type": "error", ...} event carrying
+            tokens_used, response_time_ms and time_to_first_token_ms
+        """
+        start_time = time.time()
+        time_to_first_token_ms = None
+        
+        cache_key, embedding, cached = self._lookup_cache(message, conversation_id, use_cache)
+        if cached is not None:
+            # A cached answer is sent as a single chunk
+            self._remember_turn(conversation_id, message, cached.text)
+            yield {"type": "token", "text": cached.text}
+            response_time_ms = (time.time() - start_time) * 1000
+            yield {
+                "type": "done",
+                "tokens_used": 0,
+                "response_time_ms": response_time_ms,
+                "time_to_first_token_ms": response_time_ms
+            }
+            return
+        
+        if not self.is_connected():
+            yield {
+                "type": "error",
+                "message": (
+                    "I'm sorry, but the AI service is currently unavailable. "
+                    "Please try again later or contact support."
+                ),
+                "tokens_used": 0,
+                "response_time_ms": (time.time() - start_time) * 1000,
+                "time_to_first_token_ms": None
+            }
+            return
+        
+        chunks = []
+        last_chunk = None
+        
+        try:
+            prompt_estimate = self._estimate_prompt_tokens(message, conversation_id)
+            tiers = self._route(message, conversation_id)
+            async with self._admitted():
+                for index, tier in enumerate(tiers):
+                    breaker = self.upstreams[tier.model].breaker
+                    has_fallback = index + 1 < len(tiers)
+                    attempt_start = time.monotonic()
+                    try:
+                        # Streams are not retried or hedged (tokens may already be on
+                        # the wire), but they still feed and respect the breaker
+                        breaker.allow()
+                        try:
+                            async with asyncio.timeout(
+                                self.fallback_after_seconds if has_fallback
+                                else self.upstreams[tier.model].timeout_seconds
+                            ):
+                                stream = await self.client.aio.models.generate_content_stream(
+                                    model=tier.model,
+                                    contents=self._build_contents(message, conversation_id),
+                                    config=await self._get_generation_config(tier)
+                                )
+                            
+                            async for chunk in stream:
+                                last_chunk = chunk
+                                text = chunk.text
+                                if not text:
+                                    continue
+                                
+                                if time_to_first_token_ms is None:
+                                    time_to_first_token_ms = (time.time() - start_time) * 1000
+                                
+                                chunks.append(text)
+                                yield {"type": "token", "text": text}
+                        except Exception as e:
+                            if is_retryable(e):
+                                breaker.record_failure()
+                            else:
+                                breaker.record_success()
+                            raise
+                    except Exception as e:
+                        datadog_metrics.track_model_call(
+                            tier.model, (time.monotonic() - attempt_start) * 1000,
+                            success=False, error_type=type(e).__name__
+                        )
+                        # Only fail over while nothing has been sent to the client
+                        if not chunks and has_fallback and self._should_fall_back(e):
+                            logger.warning("Falling back to next model", model=tier.model,
+                                           fallback=tiers[index + 1].model, error=str(e) or type(e).__name__)
+                            continue
+                        raise
+                    
+                    breaker.record_success()
+                    usage = getattr(last_chunk, "usage_metadata", None)
+                    datadog_metrics.track_model_call(
+                        tier.model, (time.monotonic() - attempt_start) * 1000,
+                        tokens_used=getattr(usage, "total_token_count", None) or 0 if usage else 0,
+                        fallback=index > 0
+                    )
+                    break
+            
+        except AdmissionRejected:
+            # Raised before the first event, so the API layer can still answer 429/503
+            raise
+        except Exception as e:
+            logger.error("Error streaming response", error=str(e))
+            
+            yield {
+                "type": "error",
+                "message": (
+                    "I apologize, but I encountered an issue processing your request. "
+                    "This could be due to content safety filters or a temporary issue. "
+                    "Please try rephrasing your question or try again later."
+                ),
+                "tokens_used": 0,
+                "response_time_ms": (time.time() - start_time) * 1000,
+                "time_to_first_token_ms": time_to_first_token_ms
+            }
+            return
+        
+        response_text = "".join(chunks)
+        response_time_ms = (time.time() - start_time) * 1000
+        
+        # The final chunk carries usage metadata for the whole stream
+        total_tokens = self._count_tokens(message, response_text, last_chunk)
+        self._track_prompt_tokens(prompt_estimate, last_chunk)
+        
+        self._store_cache(cache_key, embedding, response_text, total_tokens,
+                          fallback=tier is not tiers[0])
+        self._remember_turn(conversation_id, message, response_text)
+        
+        logger.info(
+            "Streamed health response",
+            conversation_id=conversation_id,
+            model=tier.model,
+            input_length=len(message),
+            output_length=len(response_text),
+            tokens=total_tokens,
+            response_time_ms=round(response_time_ms, 2),
+            time_to_first_token_ms=round(time_to_first_token_ms, 2) if time_to_first_token_ms else None
+        )
+        
+        yield {
+            "type": "done",
+            "tokens_used": total_tokens,
+            "response_time_ms": response_time_ms,
+            "time_to_first_token_ms": time_to_first_token_ms
+        }
     
     def clear_conversation(self, conversation_id: str) -> bool:
         """Clear a conversation's history"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        if self.conversations.clear(conversation_id):
             logger.info("Conversation cleared", conversation_id=conversation_id)
             return True
         return False
@@ -0,0 +1,302 @@
+"""
+HealthBot Monitor - Log Pipeline
+structlog setup with sampling of high-volume events and a non-blocking
+sink: the request path only filters, stamps and enqueues each event, and a
+background writer thread renders JSON and writes it out.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
+import structlog
+
+# No sampling unless LOG_SAMPLE_RATES lists events; anything unlisted is kept
+DEFAULT_SAMPLE_RATES = ""
+
+# Chatty INFO loggers from dependencies (httpx logs every Gemini/Datadog call)
+QUIET_LOGGERS = ("httpx", "httpcore", "urllib3")
+
+# Records rendered per write() by the writer thread
+WRITE_BATCH = 256
+
+_STOP = object()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"event=rate,event=rate" -> {event: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        name, sep, rate = item.rpartition("=")
+        if sep and name.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class LogSampler:
+    """
+    Keeps a fraction of the debug/info events listed in `rates`
+    Used as a structlog processor for plain log messages (keyed on the
+    event text) and called directly by DatadogMetrics.log_event before it
+    builds the event payload. Warnings and errors are never sampled.
+    """
+    
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.rates = rates or {}
+        self.dropped: Dict[str, int] = {}
+    
+    def keep(self, event: Optional[str]) -> bool:
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1.0:
+            return True
+        if rate > 0.0 and random.random() < rate:
+            return True
+        self.dropped[event] = self.dropped.get(event, 0) + 1
+        return False
+    
+    def __call__(self, logger, method_name: str, event_dict: dict) -> dict:
+        if method_name in ("debug", "info") and not self.keep(event_dict.get("event")):
+            raise structlog.DropEvent
+        return event_dict
+
+
+class LogWriter:
+    """
+    Background thread that renders queued events as JSON lines
+    The queue carries structlog event dicts (put there by QueueLogger) and
+    stdlib LogRecords from other libraries (put there by QueueHandler).
+    Producers never block: when the queue is full the event is counted and
+    dropped rather than stalling the event loop.
+    """
+    
+    def __init__(self, stream: TextIO, queue_size: int = 10000):
+        self.stream = stream
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._render = structlog.processors.JSONRenderer()
+        self._unicode = structlog.processors.UnicodeDecoder()
+        self._record_formatter = structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.format_exc_info,
+            ],
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.UnicodeDecoder(),
+                structlog.processors.JSONRenderer(),
+            ]
+        )
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+    
+    def put(self, item: Any):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        """Write out everything queued so far, then end the thread"""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+    
+    def _format(self, item: Any) -> str:
+        if isinstance(item, logging.LogRecord):
+            return self._record_formatter.format(item)
+        timestamp = item.get("timestamp")
+        if isinstance(timestamp, float):
+            # Stamped as epoch seconds on the request path, formatted here
+            item["timestamp"] = datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+        return self._render(None, "", self._unicode(None, "", item))
+    
+    def _run(self):
+        get, get_nowait = self.queue.get, self.queue.get_nowait
+        while True:
+            batch = [get()]
+            try:
+                while len(batch) < WRITE_BATCH:
+                    batch.append(get_nowait())
+            except queue.Empty:
+                pass
+            
+            lines = []
+            stopping = False
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                    continue
+                try:
+                    lines.append(self._format(item))
+                except Exception as e:
+                    lines.append(f'{{"event": "log render failed", "error": {str(e)!r}}}')
+            
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    pass
+            if stopping:
+                return
+
+
+class QueueLogger:
+    """structlog logger that hands each processed event dict to the writer"""
+    
+    def __init__(self, writer: LogWriter, name: Optional[str] = None):
+        self.name = name
+        self._put = writer.put
+    
+    def msg(self, event_dict: dict):
+        self._put(event_dict)
+    
+    debug = info = warning = warn = error = critical = exception = fatal = log = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, writer: LogWriter):
+        self.writer = writer
+    
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self.writer, args[0] if args else None)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Hands stdlib records to the writer unformatted and without blocking"""
+    
+    def __init__(self, writer: LogWriter):
+        super().__init__(writer.queue)
+        self.writer = writer
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        self.writer.put(record)
+
+
+def _stamp_time(logger, method_name: str, event_dict: dict) -> dict:
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+
+def _to_writer(logger, method_name: str, event_dict: dict):
+    # Passed to QueueLogger.msg as a single argument, unrendered
+    return (event_dict,), {}
+
+
+class LogPipeline:
+    """Handles to the configured pipeline, for stats and shutdown"""
+    
+    def __init__(self, sampler: LogSampler, writer: Optional[LogWriter] = None):
+        self.sampler = sampler
+        self.writer = writer
+    
+    def stop(self):
+        """Flush queued records and stop the writer thread"""
+        if self.writer is not None:
+            self.writer.stop()
+    
+    def stats(self) -> Dict[str, object]:
+        return {
+            "async_sink": self.writer is not None,
+            "queued": self.writer.queue.qsize() if self.writer else 0,
+            "dropped_queue_full": self.writer.dropped if self.writer else 0,
+            "sampled_out": dict(self.sampler.dropped)
+        }
+
+
+def configure_logging(async_sink: bool = True, sample_rates: Optional[Dict[str, float]] = None,
+                      level: str = "INFO", queue_size: int = 10000,
+                      stream: Optional[TextIO] = None) -> LogPipeline:
+    """
+    Configure structlog and the stdlib root logger
+    
+    With `async_sink`, structlog events skip the stdlib logging machinery:
+    below-level calls are no-ops, and the rest are sampled, stamped and
+    queued for the writer thread, which renders and writes them. Otherwise
+    events go through stdlib logging and are rendered and written
+    synchronously by the caller (the original setup).
+    """
+    sampler = LogSampler(sample_rates)
+    stream = stream or sys.stdout
+    
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    
+    if async_sink:
+        writer = LogWriter(stream, queue_size)
+        handler = QueueHandler(writer)
+        structlog.configure(
+            processors=[
+                sampler,
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.StackInfoRenderer(),
+                # Tracebacks are rendered where they are raised
+                structlog.processors.format_exc_info,
+                _stamp_time,
+                _to_writer,
+            ],
+            context_class=dict,
+            logger_factory=QueueLoggerFactory(writer),
+            wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelName(level.upper())),
+            cache_logger_on_first_use=True,
+        )
+    else:
+        writer = None
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        structlog.configure(
+            processors=[
+                structlog.stdlib.filter_by_level,
+                sampler,
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.PositionalArgumentsFormatter(),
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.StackInfoRenderer(),
+                structlog.processors.format_exc_info,
+                structlog.processors.UnicodeDecoder(),
+                structlog.processors.JSONRenderer()
+            ],
+            context_class=dict,
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            wrapper_class=structlog.stdlib.BoundLogger,
+            cache_logger_on_first_use=True,
+        )
+    
+    for existing in list(root.handlers):
+        if getattr(existing, "_healthbot_sink", False):
+            root.removeHandler(existing)
+    handler._healthbot_sink = True
+    root.addHandler(handler)
+    
+    pipeline = LogPipeline(sampler, writer)
+    if writer is not None:
+        writer.start()
+        atexit.register(pipeline.stop)
+    return pipeline
+
+
+def configure_from_env() -> LogPipeline:
+    """configure_logging() with LOG_* environment settings"""
+    return configure_logging(
+        async_sink=os.getenv("LOG_ASYNC", "true").lower() == "true",
+        sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", DEFAULT_SAMPLE_RATES)),
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    )
@@ -4,13 +4,15 @@ Complete AI Health Assistant with Datadog Observability
 """
 import os
 import time
+import asyncio
 import uuid
 from datetime import datetime
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,11 +20,18 @@ load_dotenv()
 
 # Import our modules
 from models import (
-    ChatRequest, ChatResponse, HealthCheckResponse, 
-    ErrorResponse, HealthMetrics, DashboardData, MetricData
+    ChatRequest, ChatResponse, ChatStreamSummary, ChatBatchRequest, ChatBatchResult,
+    ChatBatchSummary, HealthCheckResponse, 
+    ErrorResponse, HealthMetrics, DashboardData, MetricData,
+    Alert, AlertStatus, WindowMetrics
 )
-from datadog_config import datadog_metrics
+from datadog_config import datadog_metrics, log_pipeline, ALERT_WINDOW
 from gemini_service import gemini_service
+from admission import AdmissionRejected
+from rate_limiter import RateLimitExceeded, create_rate_limiter
+from dashboard_stream import DashboardBroadcaster, _sse_frame
+from timing_middleware import TimingMiddleware
+from openmetrics import OPENMETRICS_CONTENT_TYPE, render_openmetrics
 
 # Optional: Enable Datadog APM tracing if ddtrace is available
 try:
@@ -43,6 +52,13 @@ async def lifespan(app: FastAPI):
     print(f"🤖 Gemini connected: {gemini_service.is_connected()}")
     print(f"🔍 APM Tracing: {'Enabled' if TRACING_ENABLED else 'Disabled'}")
     
+    # Gemini's local tokenizer is opt-in: it may need to download its model
+    # and is not benchmarked within the per-message budget. Count with the
+    # estimate until it is ready
+    tokenizer_task = None
+    if os.getenv("GEMINI_LOCAL_TOKENIZER", "false").lower() == "true":
+        tokenizer_task = asyncio.create_task(asyncio.to_thread(gemini_service.token_counter.load))
+    
     datadog_metrics.log_event("app_startup", {
         "gemini_connected": gemini_service.is_connected(),
         "datadog_connected": datadog_metrics.is_connected()
@@ -55,6 +71,11 @@ async def lifespan(app: FastAPI):
     datadog_metrics.log_event("app_shutdown", {
         "total_requests": datadog_metrics.request_count
     })
+    if tokenizer_task is not None:
+        tokenizer_task.cancel()
+    dashboard_broadcaster.stop()
+    datadog_metrics.shutdown()
+    log_pipeline.stop()
 
 
 # Create FastAPI app
@@ -90,25 +111,49 @@ app.add_middleware(
 )
 
 
-# Request timing middleware
-@app.middleware("http")
-async def add_timing_header(request: Request, call_next):
-    """Add response timing header and log requests"""
-    start_time = time.time()
-    
-    # Log incoming request
-    datadog_metrics.log_event("request_received", {
-        "path": request.url.path,
-        "method": request.method
-    })
-    
-    response = await call_next(request)
-    
-    # Calculate processing time
-    process_time = (time.time() - start_time) * 1000
-    response.headers["X-Process-Time-Ms"] = str(round(process_time, 2))
+# Request timing and instrumentation (added last, so it wraps CORS too)
+app.add_middleware(TimingMiddleware, metrics=datadog_metrics)
+
+
+# Per-client and per-conversation budgets for chat endpoints
+rate_limiter = create_rate_limiter()
+TRUST_PROXY_HEADERS = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+
+def _client_ip(request: Request) -> str:
+    """Client address, taken from X-Forwarded-For only behind a trusted proxy"""
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(request: Request):
+    """Dependency: refuse the request with 429 once its IP or conversation is over budget"""
+    conversation_id = None
+    try:
+        # FastAPI has already read the body, so this reuses the cached bytes
+        payload = await request.json()
+        if isinstance(payload, dict):
+            conversation_id = payload.get("conversation_id")
+    except ValueError:
+        pass
     
-    return response
+    await _check_rate_limit(_client_ip(request), conversation_id)
+
+
+async def _check_rate_limit(client_ip: str, conversation_id: Optional[str]):
+    """Charge one request to the client's and conversation's budgets, or raise 429"""
+    try:
+        await rate_limiter.check(client_ip, conversation_id)
+    except RateLimitExceeded as e:
+        datadog_metrics.track_rate_limit(e.scope)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded ({e.scope}), please slow down",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
 
 # Exception handler
@@ -156,8 +201,18 @@ async def health_check():
     )
 
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat(request: ChatRequest):
+def _admission_error(exc: AdmissionRejected) -> HTTPException:
+    """429/503 with Retry-After for a request turned away by admission control"""
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=f"HealthBot is busy ({exc.reason}), please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.post("/chat", response_model=ChatResponse, tags=["Chat"],
+          dependencies=[Depends(enforce_rate_limit)])
+async def chat(request: ChatRequest, http_request: Request):
     """
     Main chat endpoint - Ask health-related questions
     
@@ -176,12 +231,18 @@ async def chat(request: ChatRequest):
         # Get AI response from Gemini
         response_text, tokens_used, ai_response_time = await gemini_service.generate_response(
             message=request.message,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            use_cache=request.use_cache
         )
         
         # Calculate total response time
         total_response_time = (time.time() - start_time) * 1000
         
+        # Charge the LLM tokens against the caller's budgets
+        await rate_limiter.record_tokens(
+            _client_ip(http_request), request.conversation_id, tokens_used
+        )
+        
         # Track metrics in Datadog
         datadog_metrics.track_request(
             response_time_ms=total_response_time,
@@ -205,6 +266,15 @@ async def chat(request: ChatRequest):
             response_time_ms=round(total_response_time, 2)
         )
         
+    except AdmissionRejected as e:
+        datadog_metrics.track_request(
+            response_time_ms=(time.time() - start_time) * 1000,
+            tokens_used=0,
+            success=False,
+            error_type=type(e).__name__
+        )
+        raise _admission_error(e)
+        
     except Exception as e:
         response_time = (time.time() - start_time) * 1000
         
@@ -222,6 +292,260 @@ async def chat(request: ChatRequest):
         )
 
 
+@app.post("/chat/stream", tags=["Chat"], dependencies=[Depends(enforce_rate_limit)])
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Streaming chat endpoint - Server-sent events
+    
+    Emits a `token` event for each chunk as Gemini generates it, an
+    optional `error` event, and a final `done` event carrying the
+    conversation ID, tokens used and timing (including time to first token).
+    """
+    start_time = time.time()
+    conversation_id = request.conversation_id or f"conv_{uuid.uuid4().hex[:12]}"
+    
+    events = gemini_service.stream_response(
+        message=request.message,
+        conversation_id=conversation_id,
+        use_cache=request.use_cache
+    )
+    
+    # Pull the first event before responding so an admission rejection
+    # can still become a 429/503 instead of a broken stream
+    try:
+        first_event = await events.__anext__()
+    except AdmissionRejected as e:
+        datadog_metrics.track_request(
+            response_time_ms=(time.time() - start_time) * 1000,
+            tokens_used=0,
+            success=False,
+            error_type=type(e).__name__,
+            endpoint="chat_stream"
+        )
+        raise _admission_error(e)
+    
+    async def all_events():
+        yield first_event
+        async for event in events:
+            yield event
+    
+    async def event_stream():
+        final = None
+        try:
+            async for event in all_events():
+                if event["type"] == "token":
+                    yield _sse_frame("token", {"text": event["text"]})
+                else:
+                    final = event
+                    if event["type"] == "error":
+                        yield _sse_frame("error", {"message": event["message"]})
+        finally:
+            # Release the upstream slot promptly if the client went away
+            await events.aclose()
+            total_response_time = (time.time() - start_time) * 1000
+            success = final is not None and final["type"] == "done"
+            
+            if final is not None:
+                await rate_limiter.record_tokens(
+                    _client_ip(http_request), request.conversation_id, final["tokens_used"]
+                )
+            
+            # Track metrics in Datadog (also runs if the client disconnects)
+            datadog_metrics.track_request(
+                response_time_ms=total_response_time,
+                tokens_used=final["tokens_used"] if final else 0,
+                success=success,
+                error_type=None if success else "StreamError",
+                time_to_first_token_ms=final["time_to_first_token_ms"] if final else None,
+                endpoint="chat_stream"
+            )
+        
+        if final is None:
+            # The service ended the stream without its closing done/error event
+            yield _sse_frame("error", {"message": "The response stream ended unexpectedly"})
+            return
+        
+        summary = ChatStreamSummary(
+            conversation_id=conversation_id,
+            tokens_used=final["tokens_used"],
+            response_time_ms=round(total_response_time, 2),
+            time_to_first_token_ms=(
+                round(final["time_to_first_token_ms"], 2)
+                if final["time_to_first_token_ms"] is not None else None
+            )
+        )
+        yield _sse_frame("done", summary.model_dump(mode="json"))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Bulk / offline question processing
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "1000"))
+CHAT_BATCH_MAX_PARALLELISM = int(os.getenv("CHAT_BATCH_MAX_PARALLELISM", "8"))
+CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS", "120"))
+
+
+async def _admit_batch_item(client_ip: str, conversation_id: Optional[str]) -> Optional[RateLimitExceeded]:
+    """
+    Charge one batch item to the rate limits, waiting out their Retry-After
+    
+    Returns:
+        None once the item is admitted, or the rejection when the wait
+        would run past CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS
+    """
+    deadline = time.monotonic() + CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS
+    while True:
+        try:
+            await rate_limiter.check(client_ip, conversation_id, batch_item=True)
+            return None
+        except RateLimitExceeded as e:
+            if time.monotonic() + e.retry_after > deadline:
+                datadog_metrics.track_rate_limit(e.scope)
+                return e
+            await asyncio.sleep(e.retry_after)
+
+
+@app.post("/chat/batch", tags=["Chat"])
+async def chat_batch(request: ChatBatchRequest, http_request: Request):
+    """
+    Batch chat endpoint - NDJSON
+    
+    Answers every item with up to `parallelism` in flight at once, going
+    through the same response cache and admission control as /chat. One
+    `result` line is written per item in completion order (with its index
+    in the request), followed by a single `summary` line. Items without a
+    conversation ID are answered statelessly.
+    
+    The request itself costs one /chat request (429 when over budget).
+    Each item is then charged, just before it is dispatched, to the IP's
+    batch item budget and its conversation's budgets; an item over budget
+    waits for the bucket to refill and only fails if that would take more
+    than CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS.
+    """
+    if len(request.items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {CHAT_BATCH_MAX_ITEMS} items"
+        )
+    
+    client_ip = _client_ip(http_request)
+    await _check_rate_limit(client_ip, None)
+    
+    start_time = time.time()
+    parallelism = min(request.parallelism or CHAT_BATCH_MAX_PARALLELISM, CHAT_BATCH_MAX_PARALLELISM)
+    pending = iter(enumerate(request.items))
+    results: asyncio.Queue = asyncio.Queue()
+    
+    async def answer(index: int, item: ChatRequest) -> ChatBatchResult:
+        rejected = await _admit_batch_item(client_ip, item.conversation_id)
+        if rejected is not None:
+            return ChatBatchResult(
+                index=index, conversation_id=item.conversation_id, response_time_ms=0.0,
+                error=f"rate limited ({rejected.scope}), retry after {rejected.retry_after}s"
+            )
+        
+        item_start = time.time()
+        try:
+            response_text, tokens_used, _ = await gemini_service.generate_response(
+                message=item.message,
+                conversation_id=item.conversation_id,
+                use_cache=item.use_cache
+            )
+        except Exception as e:
+            item_time = (time.time() - item_start) * 1000
+            datadog_metrics.track_request(
+                response_time_ms=item_time,
+                tokens_used=0,
+                success=False,
+                error_type=type(e).__name__,
+                endpoint="chat_batch"
+            )
+            error = f"busy ({e.reason})" if isinstance(e, AdmissionRejected) else str(e)
+            return ChatBatchResult(
+                index=index, conversation_id=item.conversation_id,
+                response_time_ms=round(item_time, 2), error=error
+            )
+        
+        item_time = (time.time() - item_start) * 1000
+        await rate_limiter.record_tokens(client_ip, item.conversation_id, tokens_used)
+        datadog_metrics.track_request(
+            response_time_ms=item_time,
+            tokens_used=tokens_used,
+            success=True,
+            endpoint="chat_batch"
+        )
+        return ChatBatchResult(
+            index=index, conversation_id=item.conversation_id, response=response_text,
+            tokens_used=tokens_used, response_time_ms=round(item_time, 2)
+        )
+    
+    async def worker():
+        # Workers pull from a shared iterator, so at most `parallelism` items run at once
+        for index, item in pending:
+            await results.put(await answer(index, item))
+    
+    async def ndjson_stream():
+        workers = [asyncio.create_task(worker()) for _ in range(min(parallelism, len(request.items)))]
+        succeeded = failed = tokens_used = 0
+        item_time_total = 0.0
+        try:
+            for _ in range(len(request.items)):
+                result = await results.get()
+                if result.error is None:
+                    succeeded += 1
+                    tokens_used += result.tokens_used
+                else:
+                    failed += 1
+                item_time_total += result.response_time_ms
+                yield result.model_dump_json() + "\n"
+        finally:
+            # Stop issuing upstream calls if the client went away
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        elapsed_ms = (time.time() - start_time) * 1000
+        total_items = succeeded + failed
+        summary = ChatBatchSummary(
+            total_items=total_items,
+            succeeded=succeeded,
+            failed=failed,
+            tokens_used=tokens_used,
+            elapsed_ms=round(elapsed_ms, 2),
+            average_item_time_ms=round(item_time_total / total_items, 2),
+            items_per_second=round(total_items / (elapsed_ms / 1000), 2) if elapsed_ms else 0.0
+        )
+        yield summary.model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _health_metrics(summary: dict) -> HealthMetrics:
+    """HealthMetrics from get_metrics_summary(), labelled with what it covers"""
+    return HealthMetrics(
+        scope=summary["scope"],
+        total_requests=summary["total_requests"],
+        successful_requests=summary["successful_requests"],
+        failed_requests=summary["failed_requests"],
+        average_response_time_ms=summary["average_response_time_ms"],
+        p50_response_time_ms=summary["p50_response_time_ms"],
+        p90_response_time_ms=summary["p90_response_time_ms"],
+        p99_response_time_ms=summary["p99_response_time_ms"],
+        max_response_time_ms=summary["max_response_time_ms"],
+        total_tokens_used=summary["total_tokens_used"],
+        uptime_seconds=summary["worker"]["uptime_seconds"],
+        worker_pid=summary["worker"]["pid"]
+    )
+
+
 @app.get("/metrics", response_model=HealthMetrics, tags=["Monitoring"])
 async def get_metrics():
     """
@@ -232,57 +556,150 @@ async def get_metrics():
     - Success/failure counts
     - Average response time
     - Token usage
-    - Uptime
+    - Uptime and pid of the worker that answered
+    
+    `scope` says whether the counts are this worker's or the whole host's.
     """
     summary = datadog_metrics.get_metrics_summary()
     
-    return HealthMetrics(
-        total_requests=summary["total_requests"],
-        successful_requests=summary["successful_requests"],
-        failed_requests=summary["failed_requests"],
-        average_response_time_ms=summary["average_response_time_ms"],
-        total_tokens_used=summary["total_tokens_used"],
-        uptime_seconds=summary["uptime_seconds"]
+    return _health_metrics(summary)
+
+
+@app.get("/metrics/prometheus", tags=["Monitoring"])
+async def get_prometheus_metrics():
+    """
+    Metrics in OpenMetrics text format, for Prometheus-style scrapers
+    
+    Rendered from the counters and fixed-bucket histograms kept in process,
+    so scraping does not depend on Datadog (see DD_PUSH_METRICS).
+    """
+    return Response(content=render_openmetrics(datadog_metrics), media_type=OPENMETRICS_CONTENT_TYPE)
+
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+MAX_HISTORY_POINTS = 1000
+DASHBOARD_STREAM_RANGE_SECONDS = 15 * 60
+DASHBOARD_STREAM_STEP_SECONDS = 10
+
+
+def _parse_duration(value: str, field: str) -> int:
+    """Parse durations like "10s", "5m" or "1h" into seconds"""
+    try:
+        seconds = int(value[:-1]) * DURATION_UNITS[value[-1]]
+    except (ValueError, KeyError, IndexError):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {field} '{value}' - use a number followed by s, m or h"
+        )
+    if seconds <= 0:
+        raise HTTPException(status_code=400, detail=f"{field} must be positive")
+    return seconds
+
+
+def _build_dashboard(range_seconds: int, step_seconds: int) -> DashboardData:
+    """Assemble dashboard data for the given history range and step"""
+    summary = datadog_metrics.get_metrics_summary()
+    history = datadog_metrics.get_history(range_seconds, step_seconds)
+    
+    # Create history data points
+    response_time_history = []
+    error_rate_history = []
+    token_usage_history = []
+    for point in history:
+        timestamp = datetime.utcfromtimestamp(point["timestamp"])
+        response_time_history.append(MetricData(
+            name="response_time",
+            value=round(point["average_response_time_ms"], 2),
+            timestamp=timestamp
+        ))
+        error_rate_history.append(MetricData(
+            name="error_rate",
+            value=round(point["error_rate_percent"], 2),
+            timestamp=timestamp
+        ))
+        token_usage_history.append(MetricData(
+            name="tokens_used",
+            value=point["tokens_used"],
+            timestamp=timestamp
+        ))
+    
+    # Rolling windows and alerts share the same time-bucketed counters
+    windows = datadog_metrics.get_window_summaries()
+    now = datetime.utcnow()
+    recent_alerts = [
+        Alert(
+            id=alert["name"].lower().replace(" ", "_"),
+            name=alert["name"],
+            status=AlertStatus(alert["type"]),
+            message=alert["message"],
+            triggered_at=now
+        )
+        for alert in datadog_metrics.get_alerts_status(windows[ALERT_WINDOW])
+    ]
+    
+    return DashboardData(
+        metrics=_health_metrics(summary),
+        windows={name: WindowMetrics(**window) for name, window in windows.items()},
+        recent_alerts=recent_alerts,
+        response_time_history=response_time_history,
+        error_rate_history=error_rate_history,
+        token_usage_history=token_usage_history
     )
 
 
 @app.get("/dashboard", response_model=DashboardData, tags=["Monitoring"])
-async def get_dashboard_data():
+async def get_dashboard_data(
+    history_range: str = Query("15m", alias="range"),
+    step: str = "10s"
+):
     """
     Get data for the frontend monitoring dashboard
     
     Returns comprehensive data including:
     - Current metrics
-    - Response time history
+    - Response time, error rate and token usage history
     - Recent alerts (if any)
-    """
-    summary = datadog_metrics.get_metrics_summary()
-    response_times = datadog_metrics.get_response_time_history()
     
-    # Create response time history data points
-    response_time_history = [
-        MetricData(
-            name="response_time",
-            value=rt,
-            timestamp=datetime.utcnow()
+    Args:
+        range: How far back the history goes (e.g. 15m, 1h, 24h)
+        step: Resolution of the history points (e.g. 10s, 1m)
+    """
+    range_seconds = _parse_duration(history_range, "range")
+    step_seconds = _parse_duration(step, "step")
+    if range_seconds // step_seconds > MAX_HISTORY_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"range/step would return more than {MAX_HISTORY_POINTS} points"
         )
-        for rt in response_times
-    ]
     
-    # Calculate error rate for history
-    error_rate = summary["error_rate_percent"]
+    try:
+        return _build_dashboard(range_seconds, step_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# One snapshot per tick, shared by every /dashboard/stream subscriber
+dashboard_broadcaster = DashboardBroadcaster(
+    build_snapshot=lambda: _build_dashboard(
+        DASHBOARD_STREAM_RANGE_SECONDS, DASHBOARD_STREAM_STEP_SECONDS
+    ).model_dump(mode="json"),
+    interval_seconds=float(os.getenv("DASHBOARD_STREAM_INTERVAL_SECONDS", "5"))
+)
+
+
+@app.get("/dashboard/stream", tags=["Monitoring"])
+async def stream_dashboard_data():
+    """
+    Live dashboard over server-sent events
     
-    return DashboardData(
-        metrics=HealthMetrics(
-            total_requests=summary["total_requests"],
-            successful_requests=summary["successful_requests"],
-            failed_requests=summary["failed_requests"],
-            average_response_time_ms=summary["average_response_time_ms"],
-            total_tokens_used=summary["total_tokens_used"],
-            uptime_seconds=summary["uptime_seconds"]
-        ),
-        recent_alerts=[],
-        response_time_history=response_time_history
+    Sends a `snapshot` event with the full dashboard (15m of history at
+    10s steps) on connect, then a `delta` event per tick with only the
+    changed counters, windows, alerts and new or updated history points.
+    """
+    return StreamingResponse(
+        dashboard_broadcaster.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -305,14 +722,34 @@ async def get_detailed_stats():
     """Get detailed statistics for debugging and monitoring"""
     return {
         "metrics": datadog_metrics.get_metrics_summary(),
+        "models": datadog_metrics.get_model_summaries(),
+        "http_routes": datadog_metrics.get_http_summaries(),
         "gemini": {
             "connected": gemini_service.is_connected(),
-            "active_conversations": gemini_service.get_conversation_count()
+            "active_conversations": gemini_service.get_conversation_count(),
+            "conversation_store": gemini_service.conversations.stats(),
+            "token_counter": gemini_service.token_counter.stats(),
+            "admission": gemini_service.admission.stats(),
+            "upstream": {
+                model: upstream.stats() for model, upstream in gemini_service.upstreams.items()
+            },
+            "response_cache": gemini_service.response_cache.stats(),
+            "semantic_cache": (
+                gemini_service.semantic_cache.stats()
+                if gemini_service.semantic_cache is not None else None
+            )
         },
         "datadog": {
             "connected": datadog_metrics.is_connected(),
-            "buffered_metrics": len(datadog_metrics.metrics_buffer)
+            "buffered_metrics": len(datadog_metrics.metrics_buffer),
+            "metrics_buffer": datadog_metrics.metrics_buffer.stats(),
+            "queued_metrics": datadog_metrics.shipper.pending(),
+            "dropped_metrics": datadog_metrics.shipper.dropped_points,
+            "batches_sent": datadog_metrics.shipper.batches_sent,
+            "metrics_store": datadog_metrics.store.stats()
         },
+        "rate_limiter": rate_limiter.stats(),
+        "logging": log_pipeline.stats(),
         "tracing_enabled": TRACING_ENABLED
     }
 
@@ -0,0 +1,258 @@
+"""
+HealthBot Monitor - Metrics Store
+Where DatadogMetrics keeps its request counters, latency sketch and
+rolling windows: in process memory for a single worker, or in a
+shared-memory region so every worker on the host reports the whole service.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import structlog
+
+from aggregates import FixedHistogram, LatencySketch, RollingWindow, query_windows, series_windows
+
+logger = structlog.get_logger(__name__)
+
+# Optional: claiming a worker slot in the shared region needs a file lock (POSIX only)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# (retention_seconds, resolution_seconds) per history tier, finest first
+TierSpec = Tuple[int, int]
+
+_REGION_MAGIC = b"HBMETRC1"
+_REGION_HEADER_BYTES = 64
+
+
+def pid_running(pid: int) -> bool:
+    """Whether a process with this pid exists (it may belong to another user)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricSlot:
+    """
+    One writer's share of the aggregates: request/error/token counters, a
+    latency sketch, a fixed-bucket latency histogram and a rolling window per
+    history tier, laid out in a single buffer (a pid field first, then the
+    counters, sketch, histogram and tiers)
+    """
+    
+    def __init__(self, tier_specs: Sequence[TierSpec], buffer: Optional[memoryview] = None):
+        if buffer is None:
+            buffer = memoryview(bytearray(self.nbytes(tier_specs)))
+        
+        self.header = buffer[:8].cast("q")
+        # requests, errors, tokens
+        self.counters = buffer[8:32].cast("Q")
+        
+        offset = 32
+        sketch_bytes = LatencySketch.nbytes()
+        self.sketch = LatencySketch(buffer=buffer[offset:offset + sketch_bytes])
+        offset += sketch_bytes
+        histogram_bytes = FixedHistogram.nbytes()
+        self.histogram = FixedHistogram(buffer=buffer[offset:offset + histogram_bytes])
+        offset += histogram_bytes
+        
+        self.tiers: List[RollingWindow] = []
+        for retention, resolution in tier_specs:
+            tier_bytes = RollingWindow.nbytes(retention, resolution)
+            self.tiers.append(RollingWindow(retention, resolution, buffer=buffer[offset:offset + tier_bytes]))
+            offset += tier_bytes
+    
+    @staticmethod
+    def nbytes(tier_specs: Sequence[TierSpec]) -> int:
+        size = 32 + LatencySketch.nbytes() + FixedHistogram.nbytes()
+        size += sum(RollingWindow.nbytes(retention, resolution) for retention, resolution in tier_specs)
+        # Keep every slot 8-byte aligned
+        return (size + 7) // 8 * 8
+    
+    @property
+    def pid(self) -> int:
+        return self.header[0]
+    
+    def record(self, timestamp: float, latency_ms: float, tokens: int, error: bool):
+        counters = self.counters
+        counters[0] += 1
+        if error:
+            counters[1] += 1
+        else:
+            counters[2] += tokens
+        self.sketch.add(latency_ms)
+        self.histogram.observe(latency_ms)
+        for tier in self.tiers:
+            tier.record(timestamp, latency_ms, tokens=0 if error else tokens, error=error)
+
+
+class LocalMetricsStore:
+    """
+    Aggregates for this process only - correct when there is a single worker
+    record/totals/latency_summary/latency_histogram/query/series/stats are
+    the whole store interface. Both stores are host-local: replicas on other
+    hosts each report their own aggregates, to be summed by Datadog.
+    """
+    
+    # What the aggregates cover, reported next to them on /metrics
+    scope = "process"
+    
+    def __init__(self, tier_specs: Sequence[TierSpec]):
+        self.tier_specs = list(tier_specs)
+        self._slot = MetricSlot(self.tier_specs)
+    
+    def _slots(self) -> List[MetricSlot]:
+        """Slots to aggregate on read"""
+        return [self._slot]
+    
+    def record(self, timestamp: float, latency_ms: float, tokens: int = 0, error: bool = False):
+        """Record one request (single writer per slot, so no lock)"""
+        self._slot.record(timestamp, latency_ms, tokens, error)
+    
+    def totals(self) -> Tuple[int, int, int]:
+        """(requests, errors, tokens) across every slot"""
+        requests = errors = tokens = 0
+        for slot in self._slots():
+            counters = slot.counters
+            requests += counters[0]
+            errors += counters[1]
+            tokens += counters[2]
+        return requests, errors, tokens
+    
+    def latency_summary(self) -> Dict[str, float]:
+        slots = self._slots()
+        if len(slots) == 1:
+            return slots[0].sketch.summary()
+        return LatencySketch.merged([slot.sketch for slot in slots]).summary()
+    
+    def latency_histogram(self) -> FixedHistogram:
+        slots = self._slots()
+        if len(slots) == 1:
+            return slots[0].histogram
+        return FixedHistogram.merged([slot.histogram for slot in slots])
+    
+    def query(self, tier: int, seconds: int, now: float) -> Dict[str, float]:
+        return query_windows([slot.tiers[tier] for slot in self._slots()], seconds, now)
+    
+    def series(self, tier: int, start: float, end: float, step_seconds: int) -> List[Dict[str, float]]:
+        return series_windows([slot.tiers[tier] for slot in self._slots()], start, end, step_seconds)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "workers": len(self._slots())}
+
+
+class SharedMemoryMetricsStore(LocalMetricsStore):
+    """
+    Aggregates shared by every worker on one host through an mmap'd file
+    The region holds one slot per worker. Each worker claims a slot once at
+    startup (under a file lock) and is its only writer afterwards, so the
+    request path takes no lock; readers sum across every slot ever claimed.
+    A restarted worker takes over a dead worker's slot and keeps counting
+    on top of it, so totals survive worker restarts.
+    """
+    
+    scope = "host"
+    
+    def __init__(self, tier_specs: Sequence[TierSpec], path: str, max_workers: int = 16):
+        self.tier_specs = list(tier_specs)
+        self.path = path
+        self.max_workers = max_workers
+        self.slot_bytes = MetricSlot.nbytes(self.tier_specs)
+        size = _REGION_HEADER_BYTES + max_workers * self.slot_bytes
+        
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self._mmap = self._map_region(fd, size)
+                self.slots = [
+                    MetricSlot(self.tier_specs, buffer=self._slot_buffer(index))
+                    for index in range(max_workers)
+                ]
+                self._slot = self._claim_slot()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+        
+        logger.info("Shared metrics region attached", path=path, slot=self.slots.index(self._slot))
+    
+    def _map_region(self, fd: int, size: int) -> mmap.mmap:
+        header = os.pread(fd, _REGION_HEADER_BYTES, 0)
+        layout = _REGION_MAGIC + self.slot_bytes.to_bytes(8, "little") + self.max_workers.to_bytes(8, "little")
+        if not header.startswith(layout):
+            # New region, or one written with a different layout: start from zero
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, size)
+            os.pwrite(fd, layout, 0)
+        return mmap.mmap(fd, size)
+    
+    def _slot_buffer(self, index: int) -> memoryview:
+        start = _REGION_HEADER_BYTES + index * self.slot_bytes
+        return memoryview(self._mmap)[start:start + self.slot_bytes]
+    
+    def _claim_slot(self) -> MetricSlot:
+        pid = os.getpid()
+        # Prefer a slot we already hold, then one a dead worker held, then a fresh one
+        for slot in self.slots:
+            if slot.pid == pid:
+                return slot
+        for slot in self.slots:
+            if slot.pid > 0 and not pid_running(slot.pid):
+                slot.header[0] = pid
+                return slot
+        for slot in self.slots:
+            if slot.pid == 0:
+                slot.header[0] = pid
+                return slot
+        raise RuntimeError(f"All {self.max_workers} shared metrics slots are in use")
+    
+    def _slots(self) -> List[MetricSlot]:
+        return [slot for slot in self.slots if slot.pid != 0]
+    
+    def stats(self) -> Dict[str, Any]:
+        slots = self._slots()
+        return {
+            "backend": type(self).__name__,
+            "path": self.path,
+            "workers": len(slots),
+            "live_workers": sum(1 for slot in slots if pid_running(slot.pid))
+        }
+
+
+def default_region_path() -> str:
+    """
+    Per-deployment region file, stable across restarts
+    Keyed on the user and working directory rather than a pid, so a
+    restarted master reattaches to (and takes over the slots in) the same
+    region instead of leaving a new file behind in /dev/shm every time.
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    deployment = hashlib.sha1(os.getcwd().encode()).hexdigest()[:12]
+    return os.path.join(directory, f"healthbot_metrics_{os.getuid()}_{deployment}.bin")
+
+
+def create_metrics_store(tier_specs: Sequence[TierSpec]) -> LocalMetricsStore:
+    """Build the store from environment settings (METRICS_STORE=local|shared)"""
+    backend = os.getenv("METRICS_STORE", "local").lower()
+    if backend == "shared":
+        if FCNTL_AVAILABLE:
+            try:
+                return SharedMemoryMetricsStore(
+                    tier_specs,
+                    path=os.getenv("METRICS_SHARED_PATH") or default_region_path(),
+                    max_workers=int(os.getenv("METRICS_SHARED_MAX_WORKERS", "16"))
+                )
+            except (OSError, RuntimeError) as e:
+                logger.warning("Shared metrics region unavailable - using per-process metrics", error=str(e))
+        else:
+            logger.warning("METRICS_STORE=shared needs fcntl - using per-process metrics")
+    return LocalMetricsStore(tier_specs)
@@ -0,0 +1,62 @@
+"""
+HealthBot Monitor - Model Router
+Picks a Gemini model tier and output budget per request, with fallbacks
+"""
+import re
+from dataclasses import dataclass
+from typing import List
+
+# Quick definitional / factual questions that rarely need a long answer
+_FAQ_PATTERN = re.compile(
+    r"^(what (is|are|does)|what's|define|how many|how much|is it (ok|safe)|can i|should i|"
+    r"when should|how long|how often)\b",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """A model and the output budget requests routed to it get"""
+    name: str
+    model: str
+    max_output_tokens: int
+
+
+class ModelRouter:
+    """
+    Routes short, FAQ-like, context-free questions to a cheaper, faster tier
+    and everything else to the standard tier. `route` returns the tiers in
+    the order they should be tried; the other tier is the fallback.
+    """
+    
+    def __init__(self, standard: ModelTier, fast: ModelTier,
+                 short_message_chars: int = 160, fallback_enabled: bool = True):
+        self.standard = standard
+        self.fast = fast
+        self.short_message_chars = short_message_chars
+        self.fallback_enabled = fallback_enabled
+    
+    @property
+    def tiers(self) -> List[ModelTier]:
+        return [self.standard, self.fast]
+    
+    def is_simple(self, message: str, has_history: bool = False) -> bool:
+        """Short, single-shot, FAQ-shaped questions"""
+        text = message.strip()
+        return (
+            not has_history
+            and len(text) <= self.short_message_chars
+            and "\n" not in text
+            and bool(_FAQ_PATTERN.match(text))
+        )
+    
+    def route(self, message: str, has_history: bool = False) -> List[ModelTier]:
+        """Tiers to try for this message, primary first"""
+        if self.fast.model == self.standard.model:
+            return [self.standard]
+        
+        if self.is_simple(message, has_history):
+            order = [self.fast, self.standard]
+        else:
+            order = [self.standard, self.fast]
+        return order if self.fallback_enabled else order[:1]
@@ -3,7 +3,7 @@ HealthBot Monitor - Pydantic Models
 Data validation and serialization for the API
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -25,6 +25,7 @@ class ChatRequest(BaseModel):
     """Request body for chat endpoint"""
     message: str = Field(..., min_length=1, max_length=2000, description="User's health query")
     conversation_id: Optional[str] = Field(None, description="Optional conversation ID for context")
+    use_cache: bool = Field(True, description="Allow answering from the response cache")
     
     class Config:
         json_schema_extra = {
@@ -55,14 +56,65 @@ class ChatResponse(BaseModel):
         }
 
 
+class ChatStreamSummary(BaseModel):
+    """Final server-sent event of a streamed chat response"""
+    conversation_id: str = Field(..., description="Conversation ID for follow-up")
+    tokens_used: int = Field(..., description="Number of tokens used")
+    response_time_ms: float = Field(..., description="Total response time in milliseconds")
+    time_to_first_token_ms: Optional[float] = Field(None, description="Time until the first token was sent")
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ChatBatchRequest(BaseModel):
+    """Request body for the batch chat endpoint"""
+    items: List[ChatRequest] = Field(..., min_length=1, description="Questions to answer")
+    parallelism: Optional[int] = Field(
+        None, ge=1, description="Max items processed concurrently (capped server-side)"
+    )
+
+
+class ChatBatchResult(BaseModel):
+    """One NDJSON line of a batch response, emitted as each item completes"""
+    type: str = "result"
+    index: int = Field(..., description="Position of the item in the request")
+    conversation_id: Optional[str] = None
+    response: Optional[str] = None
+    tokens_used: int = 0
+    response_time_ms: float
+    error: Optional[str] = None
+
+
+class ChatBatchSummary(BaseModel):
+    """Final NDJSON line of a batch response"""
+    type: str = "summary"
+    total_items: int
+    succeeded: int
+    failed: int
+    tokens_used: int
+    elapsed_ms: float
+    average_item_time_ms: float
+    items_per_second: float
+
+
 class HealthMetrics(BaseModel):
-    """System health metrics"""
+    """
+    System health metrics
+    Request, latency and token figures cover `scope` ("process", or "host"
+    when every worker on the host shares one metrics store); uptime is the
+    serving worker's (`worker_pid`).
+    """
+    scope: str = "process"
     total_requests: int
     successful_requests: int
     failed_requests: int
     average_response_time_ms: float
+    p50_response_time_ms: float = 0.0
+    p90_response_time_ms: float = 0.0
+    p99_response_time_ms: float = 0.0
+    max_response_time_ms: float = 0.0
     total_tokens_used: int
     uptime_seconds: float
+    worker_pid: Optional[int] = None
     last_updated: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -89,9 +141,23 @@ class Alert(BaseModel):
     triggered_at: Optional[datetime] = None
 
 
+class WindowMetrics(BaseModel):
+    """Aggregated metrics over a rolling time window"""
+    window_seconds: int
+    request_count: int
+    error_count: int
+    error_rate_percent: float
+    average_response_time_ms: float
+    max_response_time_ms: float
+    tokens_used: int
+    average_tokens_per_request: float
+    tokens_per_minute: float
+
+
 class DashboardData(BaseModel):
     """Data for frontend dashboard"""
     metrics: HealthMetrics
+    windows: Dict[str, WindowMetrics] = {}
     recent_alerts: List[Alert] = []
     response_time_history: List[MetricData] = []
     error_rate_history: List[MetricData] = []
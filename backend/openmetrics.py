@@ -0,0 +1,160 @@
+"""
+HealthBot Monitor - OpenMetrics Exposition
+Renders DatadogMetrics' in-process aggregates in the OpenMetrics text
+format for pull-based scrapers (Prometheus, the Datadog agent's openmetrics
+check, ...). Everything is read from counters and fixed-bucket histograms
+that are already maintained per request, so a scrape costs O(series) no
+matter how much traffic has been served.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from aggregates import FixedHistogram
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+PREFIX = "healthbot_"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+@lru_cache(maxsize=None)
+def _le_values(bounds: Tuple[float, ...]) -> Tuple[str, ...]:
+    """Bucket bounds in seconds as "le" label values, ending with +Inf"""
+    return tuple(repr(bound / 1000) for bound in bounds) + ("+Inf",)
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class _Writer:
+    """Collects metric families, one metadata block per family"""
+    
+    def __init__(self):
+        self.lines: List[str] = []
+    
+    def family(self, name: str, kind: str, help_text: str, unit: str = ""):
+        name = PREFIX + name
+        self.lines.append(f"# TYPE {name} {kind}")
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help_text}")
+        return name
+    
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[str, float]]):
+        name = self.family(name, "counter", help_text)
+        for labels, value in samples:
+            self.lines.append(f"{name}_total{labels} {_number(value)}")
+    
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[str, float]]):
+        name = self.family(name, "gauge", help_text)
+        for labels, value in samples:
+            self.lines.append(f"{name}{labels} {_number(value)}")
+    
+    def histogram(self, name: str, help_text: str,
+                  samples: Iterable[Tuple[Dict[str, object], FixedHistogram]]):
+        """Latency histograms recorded in ms, exported in seconds"""
+        name = self.family(name, "histogram", help_text, "seconds")
+        lines = self.lines
+        for labels, histogram in samples:
+            base = _labels(**labels)
+            prefix = f"{name}_bucket{{{base[1:-1]}{',' if base else ''}le=\""
+            cumulative = 0
+            for le, bucket_count in zip(_le_values(histogram.bounds), histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"{prefix}{le}\"}} {cumulative}")
+            lines.append(f"{name}_count{base} {cumulative}")
+            lines.append(f"{name}_sum{base} {_number(histogram.total / 1000)}")
+    
+    def render(self) -> str:
+        self.lines.append("# EOF")
+        return "\n".join(self.lines) + "\n"
+
+
+def render_openmetrics(metrics) -> str:
+    """
+    OpenMetrics text for a DatadogMetrics instance
+    
+    Request totals and the request latency histogram come from the metrics
+    store, so with METRICS_STORE=shared they cover every worker on the host;
+    per-route, per-model and cache series are for the scraped process.
+    """
+    out = _Writer()
+    requests, errors, tokens = metrics.store.totals()
+    
+    out.counter("requests", "Chat requests tracked", [("", requests)])
+    out.counter("request_errors", "Chat requests that failed", [("", errors)])
+    out.counter("tokens", "Tokens used by chat requests", [("", tokens)])
+    out.histogram("request_duration_seconds", "Chat request latency",
+                  [({}, metrics.store.latency_histogram())])
+    
+    out.counter("prompt_tokens", "Prompt tokens sent to Gemini", [
+        (_labels(cache="cached"), metrics.cached_prompt_tokens_total),
+        (_labels(cache="uncached"), metrics.prompt_tokens_total - metrics.cached_prompt_tokens_total),
+    ])
+    out.counter("coalesced_requests", "Requests that shared an in-flight Gemini call",
+                [("", metrics.coalesced_requests)])
+    
+    out.counter("cache_lookups", "Response cache lookups", [
+        (_labels(cache=cache, result=result), stats[key])
+        for cache, stats in metrics.cache_stats.items()
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    ])
+    out.counter("cache_tokens_saved", "Tokens saved by cache hits", [
+        (_labels(cache=cache), stats["tokens_saved"]) for cache, stats in metrics.cache_stats.items()
+    ])
+    out.counter("admission_rejections", "Upstream calls refused by admission control", [
+        (_labels(reason=reason), count) for reason, count in metrics.admission_rejections.items()
+    ])
+    out.counter("rate_limit_rejections", "Requests refused by the rate limiter", [
+        (_labels(scope=scope), count) for scope, count in metrics.rate_limit_rejections.items()
+    ])
+    
+    models = metrics.model_stats.items()
+    out.counter("model_calls", "Upstream calls per model", [
+        (_labels(model=model), stats["requests"]) for model, stats in models
+    ])
+    out.counter("model_errors", "Failed upstream calls per model", [
+        (_labels(model=model), stats["errors"]) for model, stats in models
+    ])
+    out.counter("model_fallbacks", "Answers served by a model as a fallback", [
+        (_labels(model=model), stats["fallbacks"]) for model, stats in models
+    ])
+    out.counter("model_tokens", "Tokens used per model", [
+        (_labels(model=model), stats["tokens"]) for model, stats in models
+    ])
+    out.histogram("model_call_duration_seconds", "Upstream call latency per model", [
+        ({"model": model}, stats["histogram"]) for model, stats in models
+    ])
+    
+    routes = metrics.http_stats.values()
+    out.gauge("http_requests_in_flight", "HTTP requests being served", [("", metrics.http_in_flight)])
+    out.counter("http_responses", "HTTP responses per route and status code", [
+        (_labels(route=stats["route"], method=stats["method"], status=status), count)
+        for stats in routes
+        for status, count in stats["status"].items()
+    ])
+    out.counter("http_request_bytes", "HTTP request body bytes", [
+        (_labels(route=stats["route"], method=stats["method"]), stats["request_bytes"]) for stats in routes
+    ])
+    out.counter("http_response_bytes", "HTTP response body bytes", [
+        (_labels(route=stats["route"], method=stats["method"]), stats["response_bytes"]) for stats in routes
+    ])
+    out.histogram("http_request_duration_seconds", "HTTP request latency per route", [
+        ({"route": stats["route"], "method": stats["method"]}, stats["histogram"]) for stats in routes
+    ])
+    
+    out.gauge("metrics_buffered", "Metric points waiting to be pushed to Datadog",
+              [("", len(metrics.metrics_buffer))])
+    return out.render()
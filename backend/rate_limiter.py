@@ -0,0 +1,277 @@
+"""
+HealthBot Monitor - Rate Limiting
+Token buckets per client IP and per conversation, for request rate and
+LLM tokens per minute, with an in-process store and an optional Redis
+backend shared by several workers.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Optional: shared backend for multi-worker deployments
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a bucket has no budget left"""
+    
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded: {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+# (key, cost, rate per second, capacity)
+BucketRequest = Tuple[str, float, float, float]
+
+
+class InMemoryBucketStore:
+    """
+    Token buckets in an insertion-ordered dict
+    Every operation is O(1): buckets refill lazily from their last update
+    time, and the least recently used end of the dict is trimmed of
+    buckets that would already be full again (forgetting those loses
+    nothing) plus anything beyond `max_keys`.
+    """
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.evicted = 0
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+    
+    def _refill(self, key: str, rate: float, capacity: float, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now, now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+    
+    def _evict(self, now: float):
+        # A couple of pops per call keeps eviction amortized O(1)
+        for _ in range(2):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] > now and len(self._buckets) <= self.max_keys:
+                return
+            del self._buckets[key]
+            self.evicted += 1
+    
+    async def consume(self, buckets: List[BucketRequest]) -> Tuple[int, float]:
+        """
+        Take each bucket's cost only if every bucket can pay it
+        
+        Returns:
+            (-1, 0) when admitted, else the index of the first bucket short
+            of tokens and the seconds until it would have them
+        """
+        now = time.monotonic()
+        states = [self._refill(key, rate, capacity, now) for key, _, rate, capacity in buckets]
+        
+        failed, retry_after = -1, 0.0
+        for index, (bucket, (_, cost, rate, _)) in enumerate(zip(states, buckets)):
+            if bucket[0] < cost:
+                failed, retry_after = index, (cost - bucket[0]) / rate
+                break
+        
+        for bucket, (_, cost, rate, capacity) in zip(states, buckets):
+            if failed < 0:
+                bucket[0] -= cost
+            bucket[2] = now + (capacity - bucket[0]) / rate
+        
+        self._evict(now)
+        return failed, retry_after
+    
+    async def debit(self, key: str, amount: float, rate: float, capacity: float):
+        """Charge `amount` after the fact; the balance may go negative"""
+        now = time.monotonic()
+        bucket = self._refill(key, rate, capacity, now)
+        bucket[0] -= amount
+        bucket[2] = now + (capacity - bucket[0]) / rate
+
+
+# Same algorithm as InMemoryBucketStore, executed atomically inside Redis
+_REDIS_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local mode = ARGV[2]
+local tokens = {}
+local failed = -1
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[3 * i])
+    local capacity = tonumber(ARGV[3 * i + 1])
+    local cost = tonumber(ARGV[3 * i + 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local balance = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    balance = math.min(capacity, balance + math.max(0, now - ts) * rate)
+    if mode ~= 'debit' and failed < 0 and balance < cost then
+        failed = i - 1
+        retry_after = (cost - balance) / rate
+    end
+    tokens[i] = balance
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[3 * i])
+    local capacity = tonumber(ARGV[3 * i + 1])
+    if failed < 0 then
+        tokens[i] = tokens[i] - tonumber(ARGV[3 * i + 2])
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('EXPIRE', key, math.ceil((capacity - tokens[i]) / rate) + 1)
+end
+return {failed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis (keys expire once full)"""
+    
+    def __init__(self, url: str, prefix: str = "healthbot:ratelimit:"):
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_BUCKET_SCRIPT)
+    
+    async def _run(self, buckets: List[BucketRequest], mode: str) -> Tuple[int, float]:
+        args = [time.time(), mode]
+        for _, cost, rate, capacity in buckets:
+            args += [rate, capacity, cost]
+        failed, retry_after = await self._script(
+            keys=[self.prefix + key for key, _, _, _ in buckets], args=args
+        )
+        return int(failed), float(retry_after)
+    
+    async def consume(self, buckets: List[BucketRequest]) -> Tuple[int, float]:
+        return await self._run(buckets, "consume")
+    
+    async def debit(self, key: str, amount: float, rate: float, capacity: float):
+        await self._run([(key, amount, rate, capacity)], "debit")
+
+
+class RateLimiter:
+    """
+    Request and LLM-token budgets per client IP and per conversation
+    Each budget is a bucket holding one minute's allowance. Requests take
+    one token from the request buckets up front; LLM tokens are charged
+    after the response, so a request is only refused once a token bucket
+    is already in debt. Items of a /chat/batch request draw on their own
+    per-IP budget instead of the interactive request budget.
+    """
+    
+    def __init__(self, store, requests_per_minute: int = 30,
+                 conversation_requests_per_minute: int = 10,
+                 tokens_per_minute: int = 20000,
+                 conversation_tokens_per_minute: int = 10000,
+                 batch_items_per_minute: int = 1000,
+                 enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.limits = {
+            "ip_requests": requests_per_minute,
+            "conversation_requests": conversation_requests_per_minute,
+            "ip_tokens": tokens_per_minute,
+            "conversation_tokens": conversation_tokens_per_minute,
+            "ip_batch_items": batch_items_per_minute,
+        }
+        self.rejections: Dict[str, int] = {scope: 0 for scope in self.limits}
+    
+    def _bucket(self, scope: str):
+        per_minute = self.limits[scope]
+        return per_minute / 60.0, float(per_minute)
+    
+    async def check(self, client_ip: str, conversation_id: Optional[str] = None,
+                    batch_item: bool = False):
+        """
+        Admit one request or raise RateLimitExceeded
+        
+        Args:
+            batch_item: Charge the IP's batch item budget instead of its
+                request budget
+        
+        Raises:
+            RateLimitExceeded: With the scope that ran out and a Retry-After
+        """
+        if not self.enabled:
+            return
+        
+        checks = [
+            ("ip_tokens", f"ip:{client_ip}:tokens", 0),
+            ("ip_batch_items", f"ip:{client_ip}:batch_items", 1) if batch_item
+            else ("ip_requests", f"ip:{client_ip}:requests", 1),
+        ]
+        if conversation_id:
+            checks = [
+                ("conversation_tokens", f"conv:{conversation_id}:tokens", 0),
+                ("conversation_requests", f"conv:{conversation_id}:requests", 1),
+            ] + checks
+        
+        # All or nothing: a request refused by one bucket costs none of the others
+        failed, retry_after = await self.store.consume(
+            [(key, cost) + self._bucket(scope) for scope, key, cost in checks]
+        )
+        if failed >= 0:
+            scope = checks[failed][0]
+            self.rejections[scope] += 1
+            raise RateLimitExceeded(scope, max(1, int(retry_after + 0.999)))
+    
+    async def record_tokens(self, client_ip: str, conversation_id: Optional[str], tokens: int):
+        """Charge the LLM tokens a completed request used"""
+        if not self.enabled or tokens <= 0:
+            return
+        
+        rate, capacity = self._bucket("ip_tokens")
+        await self.store.debit(f"ip:{client_ip}:tokens", tokens, rate, capacity)
+        if conversation_id:
+            rate, capacity = self._bucket("conversation_tokens")
+            await self.store.debit(f"conv:{conversation_id}:tokens", tokens, rate, capacity)
+    
+    def stats(self) -> Dict:
+        stats = {
+            "enabled": self.enabled,
+            "backend": type(self.store).__name__,
+            "limits_per_minute": self.limits,
+            "rejections": self.rejections,
+        }
+        if isinstance(self.store, InMemoryBucketStore):
+            stats["tracked_keys"] = len(self.store)
+            stats["evicted_keys"] = self.store.evicted
+        return stats
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter from environment settings (Redis if RATE_LIMIT_REDIS_URL is set)"""
+    store = None
+    redis_url = os.getenv("RATE_LIMIT_REDIS_URL")
+    if redis_url:
+        if REDIS_AVAILABLE:
+            store = RedisBucketStore(redis_url)
+            logger.info("Rate limiter using shared Redis backend")
+        else:
+            logger.warning("RATE_LIMIT_REDIS_URL is set but redis is not installed - using in-memory buckets")
+    if store is None:
+        store = InMemoryBucketStore(max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")))
+    
+    return RateLimiter(
+        store,
+        requests_per_minute=int(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "30")),
+        conversation_requests_per_minute=int(os.getenv("RATE_LIMIT_CONVERSATION_REQUESTS_PER_MINUTE", "10")),
+        tokens_per_minute=int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "20000")),
+        conversation_tokens_per_minute=int(os.getenv("RATE_LIMIT_CONVERSATION_TOKENS_PER_MINUTE", "10000")),
+        batch_items_per_minute=int(os.getenv("RATE_LIMIT_BATCH_ITEMS_PER_MINUTE", "1000")),
+        enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
+    )
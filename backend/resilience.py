@@ -0,0 +1,221 @@
+"""
+HealthBot Monitor - Upstream Resilience
+Per-attempt timeouts, jittered exponential retries, optional hedged
+requests and a circuit breaker around Gemini calls.
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import structlog
+from google.genai import errors as genai_errors
+
+from admission import AdmissionRejected
+
+logger = structlog.get_logger(__name__)
+
+# HTTP statuses worth another attempt
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(AdmissionRejected):
+    """Raised without calling upstream while the circuit breaker is open"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__("circuit_open", 503, retry_after)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient failures: timeouts, transport errors, 429 and 5xx responses"""
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `recovery_seconds`, then lets a single probe through (half-open); the
+    probe's outcome closes or re-opens it.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+    
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        if self.state == self.CLOSED:
+            return
+        
+        remaining = self._opened_at + self.recovery_seconds - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            # A probe that was cancelled never reports back; don't wait on it forever
+            if not self._probe_in_flight or now - self._probe_started_at > self.recovery_seconds:
+                self._probe_in_flight = True
+                self._probe_started_at = now
+                return
+        
+        self.rejected_calls += 1
+        raise CircuitOpenError(max(1, int(remaining + 0.999)))
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Circuit breaker opened", failures=self.consecutive_failures)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls
+        }
+
+
+class ResilientCaller:
+    """
+    Runs an upstream call through the breaker with timeout, retries and hedging
+    `attempt` is a zero-argument coroutine factory so each retry or hedge
+    issues a fresh request.
+    """
+    
+    def __init__(self, breaker: CircuitBreaker, timeout_seconds: float = 30.0,
+                 max_retries: int = 2, base_delay_seconds: float = 0.2,
+                 max_delay_seconds: float = 2.0, hedge_after_seconds: Optional[float] = None):
+        self.breaker = breaker
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    async def _timed(self, attempt: Callable[[], Awaitable[Any]], timeout_seconds: float) -> Any:
+        try:
+            async with asyncio.timeout(timeout_seconds):
+                return await attempt()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+    
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]], timeout_seconds: float) -> Any:
+        """Start a second identical request if the first is slower than the hedge delay"""
+        primary = asyncio.ensure_future(self._timed(attempt, timeout_seconds))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            # Whatever is still running when the caller is cancelled (or we
+            # return) is cancelled in the finally block
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after_seconds)
+            if done:
+                return primary.result()
+            
+            self.hedges += 1
+            hedge = asyncio.ensure_future(self._timed(attempt, timeout_seconds))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def call(self, attempt: Callable[[], Awaitable[Any]], max_retries: Optional[int] = None,
+                   timeout_seconds: Optional[float] = None) -> Any:
+        """
+        Call upstream, retrying transient failures with full-jitter backoff
+        
+        Args:
+            attempt: Coroutine factory issuing one request
+            max_retries: Override the configured retry count (e.g. fewer when a fallback exists)
+            timeout_seconds: Override the configured per-attempt timeout
+            
+        Raises:
+            CircuitOpenError: The breaker is open (before or between attempts)
+            Exception: The last error once retries are exhausted or it is not retryable
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        
+        self.calls += 1
+        for attempt_number in range(max_retries + 1):
+            self.breaker.allow()
+            try:
+                if self.hedge_after_seconds is None:
+                    result = await self._timed(attempt, timeout_seconds)
+                else:
+                    result = await self._hedged(attempt, timeout_seconds)
+            except Exception as e:
+                if not is_retryable(e):
+                    # e.g. safety blocks or bad requests say nothing about upstream health
+                    self.breaker.record_success()
+                    raise
+                
+                self.breaker.record_failure()
+                if attempt_number == max_retries:
+                    raise
+                
+                self.retries += 1
+                delay = random.uniform(
+                    0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** attempt_number)
+                )
+                logger.warning("Retrying Gemini call", attempt=attempt_number + 1,
+                               delay_ms=round(delay * 1000), error=str(e))
+                await asyncio.sleep(delay)
+                continue
+            
+            self.breaker.record_success()
+            return result
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
@@ -0,0 +1,122 @@
+"""
+HealthBot Monitor - Response Cache
+In-memory LRU/TTL cache for context-free health answers
+"""
+import re
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Canonical form of a question: case, spacing and trailing punctuation ignored"""
+    return _WHITESPACE.sub(" ", message).strip().rstrip("?!.").strip().lower()
+
+
+def entry_size(key: Hashable, text: str) -> int:
+    """
+    Bytes held by a cache entry: the answer plus the key and, for tuple
+    keys, every component in it (model name, config fingerprint, message)
+    """
+    size = sys.getsizeof(key) + sys.getsizeof(text)
+    if isinstance(key, tuple):
+        size += sum(sys.getsizeof(part) for part in key)
+    return size
+
+
+@dataclass
+class CachedResponse:
+    """A cached Gemini answer"""
+    text: str
+    tokens: int
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    """
+    LRU cache with per-entry TTL and a total size bound in bytes
+    Entries are evicted least-recently-used first whenever either
+    `max_bytes` or `max_entries` would be exceeded; expired entries are
+    dropped when they are looked up.
+    """
+    
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, max_entries: int = 10000,
+                 ttl_seconds: float = 3600, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Look up a fresh entry and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            entry = None
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def put(self, key: Hashable, text: str, tokens: int):
+        """Store an answer, evicting LRU entries to stay within bounds"""
+        size = entry_size(key, text)
+        if size > self.max_bytes:
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        
+        while self._entries and (
+            self.size_bytes + size > self.max_bytes or len(self._entries) >= self.max_entries
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        
+        self._entries[key] = CachedResponse(
+            text=text,
+            tokens=tokens,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            size=size
+        )
+        self.size_bytes += size
+    
+    def _remove(self, key: Hashable):
+        # entry.size is the figure added in put(), so the total stays exact
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry.size
+    
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate_percent": round(self.hits / lookups * 100, 2) if lookups else 0.0
+        }
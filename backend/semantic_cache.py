@@ -0,0 +1,145 @@
+"""
+HealthBot Monitor - Semantic Response Cache
+Near-duplicate question matching with a hashing vectorizer and a
+NumPy-backed nearest-neighbour index (CPU only, no model downloads)
+"""
+import re
+import time
+import zlib
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+
+from response_cache import CachedResponse, normalize_message
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Function words that carry no topic; dropping them lets rephrasings match
+STOPWORDS = frozenset("""
+a an and are as at be been being can could do does for from how i in is it
+me my of on or please should tell the to what whats when which who why will
+with would you your about any some there their this that these those get
+""".split())
+
+
+class HashingEmbedder:
+    """
+    Stateless text embedder
+    Hashes content words and their character trigrams into a fixed number
+    of signed dimensions and L2-normalizes the result, so cosine similarity
+    is a dot product.
+    """
+    
+    def __init__(self, dim: int = 512, word_weight: float = 2.0):
+        self.dim = dim
+        self.word_weight = word_weight
+    
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        # crc32 is stable across processes, unlike hash()
+        h = zlib.crc32(feature.encode())
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+    
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = [w for w in _WORD.findall(normalize_message(text)) if w not in STOPWORDS]
+        
+        for word in words:
+            # Crude plural folding so "symptom" and "symptoms" share a feature
+            stem = word[:-1] if len(word) > 3 and word.endswith("s") else word
+            self._add(vector, "w:" + stem, self.word_weight)
+            padded = f" {stem} "
+            for i in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[i:i + 3], 1.0)
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Fixed-capacity nearest-neighbour cache of answers
+    Embeddings live in one preallocated float32 matrix; a lookup is a
+    single matrix-vector product. When full, the least recently used slot
+    is overwritten. Every entry belongs to a namespace (the model and config
+    that produced the answer) and only matches lookups in the same one.
+    """
+    
+    def __init__(self, embedder: HashingEmbedder, max_entries: int = 5000,
+                 threshold: float = 0.85, ttl_seconds: float = 3600):
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._vectors = np.zeros((max_entries, embedder.dim), dtype=np.float32)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._entries: list = [None] * max_entries
+        # Namespaces are interned to small ints so a lookup can mask by them
+        self._namespaces: Dict[Hashable, int] = {}
+        self._slot_namespace = np.full(max_entries, -1, dtype=np.int32)
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def embed(self, message: str) -> np.ndarray:
+        return self.embedder.embed(message)
+    
+    def get(self, vector: np.ndarray, namespace: Hashable) -> Optional[CachedResponse]:
+        """Return the closest cached answer in `namespace` if it is similar enough"""
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None or not vector.any():
+            self.misses += 1
+            return None
+        
+        now = time.monotonic()
+        scores = self._vectors[:self._count] @ vector
+        # Expired slots and other namespaces can never match
+        scores[self._expires_at[:self._count] <= now] = -1.0
+        scores[self._slot_namespace[:self._count] != namespace_id] = -1.0
+        best = int(np.argmax(scores))
+        
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        
+        self._last_used[best] = now
+        self.hits += 1
+        return self._entries[best]
+    
+    def put(self, vector: np.ndarray, namespace: Hashable, text: str, tokens: int):
+        """Index an answer under its question embedding within `namespace`"""
+        if not vector.any():
+            return
+        
+        if self._count < self.max_entries:
+            slot = self._count
+            self._count += 1
+        else:
+            slot = int(np.argmin(self._last_used))
+            self.evictions += 1
+        
+        now = time.monotonic()
+        self._vectors[slot] = vector
+        self._last_used[slot] = now
+        self._expires_at[slot] = now + self.ttl_seconds
+        self._slot_namespace[slot] = self._namespaces.setdefault(namespace, len(self._namespaces))
+        self._entries[slot] = CachedResponse(
+            text=text, tokens=tokens, expires_at=now + self.ttl_seconds, size=len(text)
+        )
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate_percent": round(self.hits / lookups * 100, 2) if lookups else 0.0
+        }
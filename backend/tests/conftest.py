@@ -0,0 +1,5 @@
+"""Tests import the flat backend modules the same way main.py does"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
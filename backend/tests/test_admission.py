@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_slots_are_granted_without_waiting():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=2)
+        assert await controller.acquire() == 0.0
+        assert await controller.acquire() == 0.0
+        assert controller.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_waiter_is_admitted_when_a_slot_frees_up():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert controller.waiting == 1
+
+        controller.release(held_seconds=0.01)
+        assert await waiter > 0
+        assert (controller.in_flight, controller.waiting, controller.admitted) == (1, 0, 2)
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as raised:
+            await controller.acquire()
+        assert (raised.value.reason, raised.value.status_code) == ("queue_full", 429)
+        assert raised.value.retry_after >= 1
+
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_rejected_with_503():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout_seconds=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as raised:
+            await controller.acquire()
+        assert (raised.value.reason, raised.value.status_code) == ("queue_timeout", 503)
+        assert controller.waiting == 0
+        assert controller.rejected_timeout == 1
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_follows_slot_turnover():
+    controller = AdmissionController(max_in_flight=2)
+    controller.average_hold_seconds = 4.0
+    controller.waiting = 3
+    # (3 waiting + this request) / 2 slots * 4s per turn
+    assert controller.retry_after() == 8
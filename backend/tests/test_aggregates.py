@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from aggregates import FixedHistogram, LatencySketch
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "lognormal"])
+def test_quantiles_within_relative_accuracy(distribution):
+    rng = random.Random(7)
+    if distribution == "uniform":
+        values = [rng.uniform(50, 5000) for _ in range(20000)]
+    else:
+        values = [rng.lognormvariate(6, 1.2) for _ in range(20000)]
+
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    summary = sketch.summary()
+    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        exact = _exact(values, q)
+        assert abs(summary[name] - exact) <= 0.01 * exact
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+    assert summary["max"] == max(values)
+    assert summary["avg"] == pytest.approx(sum(values) / len(values))
+
+
+def test_underflow_bucket_reports_the_observed_minimum():
+    sketch = LatencySketch(min_value=0.1)
+    for value in (0.01, 0.05, 500.0):
+        sketch.add(value)
+    assert sketch.quantile(0) == 0.01
+    assert sketch.quantile(1) == pytest.approx(500.0, rel=0.01)
+
+
+def test_merged_sketch_matches_a_single_sketch():
+    rng = random.Random(3)
+    values = [rng.uniform(1, 2000) for _ in range(3000)]
+    single = LatencySketch()
+    parts = [LatencySketch() for _ in range(3)]
+    for index, value in enumerate(values):
+        single.add(value)
+        parts[index % 3].add(value)
+
+    merged = LatencySketch.merged(parts)
+    assert merged.summary() == pytest.approx(single.summary())
+    assert merged.count == single.count
+
+
+def test_empty_sketch_summary_is_zero():
+    assert LatencySketch().summary() == {"avg": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = FixedHistogram()
+    for value in (5, 6, 10_000_000):
+        histogram.observe(value)
+    counts = list(histogram.counts)
+    assert counts[0] == 1 and counts[1] == 1 and counts[-1] == 1
+    assert histogram.total == 10_000_011
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from rate_limiter import InMemoryBucketStore, RateLimiter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def generate_response(message, conversation_id=None, use_cache=True):
+        return f"answer to {message}", 10, 1.0
+
+    monkeypatch.setattr(main.gemini_service, "generate_response", generate_response)
+    return TestClient(main.app)
+
+
+def _limit(monkeypatch, **limits):
+    limiter = RateLimiter(InMemoryBucketStore(), **limits)
+    monkeypatch.setattr(main, "rate_limiter", limiter)
+    return limiter
+
+
+def _batch(client, count):
+    response = client.post("/chat/batch", json={
+        "items": [{"message": f"question {i}"} for i in range(count)]
+    })
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return lines[:-1], lines[-1]
+
+
+def test_batch_larger_than_the_request_limit_succeeds(monkeypatch, client):
+    # Default per-IP limits: 30 requests a minute
+    limiter = _limit(monkeypatch)
+    results, summary = _batch(client, 50)
+    assert summary["succeeded"] == 50
+    assert all(result["error"] is None for result in results)
+    # The batch itself cost one interactive request
+    assert limiter.rejections["ip_requests"] == 0
+
+
+def test_items_over_the_batch_budget_wait_for_a_refill(monkeypatch, client):
+    _limit(monkeypatch, batch_items_per_minute=120)
+    results, summary = _batch(client, 122)
+    assert summary["succeeded"] == 122
+    assert summary["elapsed_ms"] >= 500
+
+
+def test_items_that_would_wait_too_long_fail(monkeypatch, client):
+    _limit(monkeypatch, batch_items_per_minute=60)
+    monkeypatch.setattr(main, "CHAT_BATCH_RATE_LIMIT_MAX_WAIT_SECONDS", 0)
+    results, summary = _batch(client, 62)
+    assert summary["succeeded"] == 60
+    errors = [result["error"] for result in results if result["error"]]
+    assert len(errors) == 2
+    assert all(error.startswith("rate limited (ip_batch_items)") for error in errors)
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+def _events(body):
+    """(event, data) pairs from an SSE body"""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], lines["data"]))
+    return events
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, "enabled", False)
+    return TestClient(main.app)
+
+
+def _stream(monkeypatch, client, service_events):
+    async def stream_response(message, conversation_id=None, use_cache=True):
+        for event in service_events:
+            yield event
+
+    monkeypatch.setattr(main.gemini_service, "stream_response", stream_response)
+    response = client.post("/chat/stream", json={"message": "What is a fever?"})
+    assert response.status_code == 200
+    return _events(response.text)
+
+
+def test_stream_ends_with_done(monkeypatch, client):
+    events = _stream(monkeypatch, client, [
+        {"type": "token", "text": "Rest "},
+        {"type": "token", "text": "and fluids."},
+        {"type": "done", "tokens_used": 12, "response_time_ms": 5.0, "time_to_first_token_ms": 1.0},
+    ])
+    assert [name for name, _ in events] == ["token", "token", "done"]
+    assert '"tokens_used": 12' in events[-1][1]
+
+
+def test_stream_without_final_event_ends_with_error(monkeypatch, client):
+    events = _stream(monkeypatch, client, [{"type": "token", "text": "Rest "}])
+    assert [name for name, _ in events] == ["token", "error"]
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from datadog_config import datadog_metrics
+from gemini_service import HEALTH_SYSTEM_PROMPT, GeminiService
+
+
+class _Models:
+    """generate_content that records each request and reports `cached` prompt tokens"""
+
+    def __init__(self, cached=0):
+        self.cached = cached
+        self.requests = []
+
+    async def generate_content(self, model, contents, config=None):
+        self.requests.append((contents, config))
+        usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=5,
+                                total_token_count=125, cached_content_token_count=self.cached)
+        return SimpleNamespace(text=f"answer {len(self.requests)}", usage_metadata=usage)
+
+
+class _Caches:
+    def __init__(self):
+        self.created = []
+
+    async def create(self, model, config=None):
+        self.created.append((model, config))
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+
+@pytest.fixture
+def service():
+    return GeminiService()
+
+
+def _connect(service, cached=0):
+    client = SimpleNamespace(aio=SimpleNamespace(models=_Models(cached), caches=_Caches()))
+    service.client = client
+    return client.aio
+
+
+def _texts(contents):
+    if isinstance(contents, str):
+        return [contents]
+    return [part.text for content in contents for part in content.parts]
+
+
+def test_system_prompt_goes_in_the_config_not_the_contents(service):
+    aio = _connect(service)
+    asyncio.run(service.generate_response("Is it safe to run with a mild cold?", "conv-1"))
+    asyncio.run(service.generate_response("And what about swimming?", "conv-1"))
+
+    # The second request carries the first turn as history
+    contents, config = aio.models.requests[1]
+    assert len(_texts(contents)) == 3
+    assert config.system_instruction == HEALTH_SYSTEM_PROMPT
+    for contents, _ in aio.models.requests:
+        assert all(HEALTH_SYSTEM_PROMPT not in text for text in _texts(contents))
+
+
+def test_context_cache_is_created_once_and_reused(service):
+    aio = _connect(service)
+    service.context_cache_enabled = True
+    asyncio.run(service.generate_response("Is it safe to run with a mild cold?"))
+    asyncio.run(service.generate_response("How much water should I drink a day?"))
+
+    assert len(aio.caches.created) == 1
+    assert aio.caches.created[0][1].system_instruction == HEALTH_SYSTEM_PROMPT
+    for _, config in aio.models.requests:
+        assert config.cached_content == "cachedContents/1"
+        assert config.system_instruction is None
+
+
+def test_cached_and_uncached_prompt_tokens_are_tracked_separately(service):
+    _connect(service, cached=100)
+    before = datadog_metrics.get_metrics_summary()["worker"]
+
+    asyncio.run(service.generate_response("Is it safe to run with a mild cold?"))
+
+    after = datadog_metrics.get_metrics_summary()["worker"]
+    assert after["cached_prompt_tokens"] - before["cached_prompt_tokens"] == 100
+    assert after["uncached_prompt_tokens"] - before["uncached_prompt_tokens"] == 20
+    assert after["last_prompt_tokens"] == 120
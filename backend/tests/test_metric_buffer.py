@@ -0,0 +1,68 @@
+import os
+
+from datadog_config import MetricBuffer
+
+
+def _points(n, start=0):
+    return [("healthbot.test", float(i), ("env:test",), 1700000000 + i) for i in range(start, start + n)]
+
+
+def test_default_spill_path_is_per_process(tmp_path):
+    buffer = MetricBuffer(max_points=2, spill_path=str(tmp_path / "spill.{pid}.jsonl"))
+    assert buffer.spill_path == str(tmp_path / f"spill.{os.getpid()}.jsonl")
+
+
+def test_overflow_is_replayed_oldest_first(tmp_path):
+    buffer = MetricBuffer(max_points=2, spill_path=str(tmp_path / "spill.{pid}.jsonl"))
+    buffer.extend(_points(5))
+    assert buffer.stats()["on_disk"] == 3
+    assert [p[1] for p in buffer.take(10)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert not os.path.exists(buffer.spill_path)
+
+
+def test_partial_replay_frees_spill_budget(tmp_path):
+    buffer = MetricBuffer(max_points=1, spill_path=str(tmp_path / "spill.{pid}.jsonl"))
+    buffer.extend(_points(11))
+    full_size = buffer._spill_size
+    buffer.spill_max_bytes = full_size
+
+    buffer.take(5)
+    assert 0 < buffer._spill_size < full_size
+    assert buffer._spill_size == os.path.getsize(buffer.spill_path) - buffer._spill_offset
+
+    # Room freed by the replay is usable again instead of dropping points
+    buffer.extend(_points(3, start=100))
+    assert buffer.dropped_points == 0
+    assert len(buffer.take(100)) == 9
+
+
+def test_segments_of_exited_processes_are_adopted(tmp_path):
+    template = str(tmp_path / "spill.{pid}.jsonl")
+    orphan = MetricBuffer(max_points=1, spill_path=template)
+    orphan.extend(_points(4))
+    # Pretend the segment belongs to a process that no longer exists
+    dead = tmp_path / "spill.999999999.jsonl"
+    os.rename(orphan.spill_path, dead)
+
+    buffer = MetricBuffer(max_points=1, spill_path=template)
+    assert not dead.exists()
+    assert [p[1] for p in buffer.take(10)] == [0.0, 1.0, 2.0]
+
+
+def test_segments_of_running_processes_are_left_alone(tmp_path):
+    template = str(tmp_path / "spill.{pid}.jsonl")
+    sibling = tmp_path / "spill.1.jsonl"
+    sibling.write_text('["healthbot.test", 1.0, [], 1700000000]\n')
+
+    buffer = MetricBuffer(max_points=1, spill_path=template)
+    assert sibling.exists()
+    assert len(buffer) == 0
+
+
+def test_replayed_head_is_compacted_away(tmp_path):
+    buffer = MetricBuffer(max_points=1, spill_path=str(tmp_path / "spill.{pid}.jsonl"))
+    buffer.extend(_points(11))
+    buffer.take(8)
+    assert buffer._spill_offset == 0
+    assert os.path.getsize(buffer.spill_path) == buffer._spill_size
+    assert [p[1] for p in buffer.take(10)] == [8.0, 9.0, 10.0]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import metrics_store
+from metrics_store import FCNTL_AVAILABLE, LocalMetricsStore, SharedMemoryMetricsStore, default_region_path
+
+TIERS = [(60, 1), (3600, 60)]
+
+needs_fcntl = pytest.mark.skipif(not FCNTL_AVAILABLE, reason="shared store needs fcntl")
+
+
+def test_default_region_path_survives_a_new_master(monkeypatch):
+    path = default_region_path()
+    monkeypatch.setattr(os, "getppid", lambda: 424242)
+    assert default_region_path() == path
+
+
+@needs_fcntl
+def test_restarted_worker_reattaches_to_the_region(tmp_path):
+    path = str(tmp_path / "region.bin")
+    store = SharedMemoryMetricsStore(TIERS, path=path, max_workers=4)
+    store.record(1000.0, 120.0, tokens=10)
+    store.record(1000.0, 80.0, error=True)
+
+    # Same pid and path, as after an in-place restart: one slot, totals kept
+    restarted = SharedMemoryMetricsStore(TIERS, path=path, max_workers=4)
+    assert restarted.totals() == (2, 1, 10)
+    assert restarted.stats()["workers"] == 1
+    assert os.listdir(tmp_path) == ["region.bin"]
+    assert restarted.scope == "host"
+
+
+@needs_fcntl
+def test_worker_keeps_its_own_slot_over_a_dead_workers(tmp_path, monkeypatch):
+    path = str(tmp_path / "region.bin")
+    dead_pid = 999_999
+    monkeypatch.setattr(metrics_store, "pid_running", lambda pid: pid != dead_pid)
+    store = SharedMemoryMetricsStore(TIERS, path=path, max_workers=4)
+    store.record(1000.0, 120.0, tokens=10)
+    # Our counts sit in slot 1 and a dead worker's in slot 0
+    store.slots[1].header[0] = os.getpid()
+    store.slots[0].header[0] = dead_pid
+
+    restarted = SharedMemoryMetricsStore(TIERS, path=path, max_workers=4)
+    assert restarted.slots.index(restarted._slot) == 1
+    assert restarted.slots[0].pid == dead_pid
+
+
+def test_local_store_totals_and_latency():
+    store = LocalMetricsStore(TIERS)
+    for latency in (100.0, 200.0, 300.0):
+        store.record(1000.0, latency, tokens=5)
+    assert store.totals() == (3, 0, 15)
+    assert store.latency_summary()["max"] == 300.0
+    assert store.query(0, 60, now=1000.0)["request_count"] == 3
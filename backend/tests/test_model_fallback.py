@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from gemini_service import GeminiService
+
+
+def _overloaded():
+    return errors.ServerError(503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}})
+
+
+class _Models:
+    """generate_content that fails the first `failures[model]` calls to a model"""
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+        self.calls = []
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls.append(model)
+        if self.failures.get(model, 0) > 0:
+            self.failures[model] -= 1
+            raise _overloaded()
+        usage = SimpleNamespace(prompt_token_count=10, candidates_token_count=5,
+                                total_token_count=15, cached_content_token_count=0)
+        return SimpleNamespace(text=f"answer from {model}", usage_metadata=usage)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("GEMINI_RETRY_BASE_DELAY_MS", "1")
+    monkeypatch.setenv("GEMINI_RETRY_MAX_DELAY_MS", "1")
+    return GeminiService()
+
+
+def _connect(service, failures):
+    models = _Models(failures)
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    return models
+
+
+STANDARD_QUESTION = "My knee has been aching after long runs for two weeks, what could be going on"
+
+
+def test_primary_is_retried_before_falling_back(service):
+    standard, fast = service.router.standard.model, service.router.fast.model
+    models = _connect(service, {standard: 1})
+
+    text, _, _ = asyncio.run(service.generate_response(STANDARD_QUESTION))
+    assert text == f"answer from {standard}"
+    assert models.calls == [standard, standard]
+    assert fast not in models.calls
+
+
+def test_fallback_answers_are_not_cached(service):
+    standard, fast = service.router.standard.model, service.router.fast.model
+    models = _connect(service, {standard: 2})
+
+    text, _, _ = asyncio.run(service.generate_response(STANDARD_QUESTION))
+    assert text == f"answer from {fast}"
+    assert models.calls == [standard, standard, fast]
+    assert len(service.response_cache) == 0
+
+    # Once the primary recovers its own answer is served and cached
+    text, _, _ = asyncio.run(service.generate_response(STANDARD_QUESTION))
+    assert text == f"answer from {standard}"
+    assert models.calls[3:] == [standard]
+    assert len(service.response_cache) == 1
+
+
+def test_cache_key_follows_the_routed_tier(service):
+    _connect(service, {})
+    faq = "What is a normal resting heart rate?"
+    asyncio.run(service.generate_response(faq))
+    asyncio.run(service.generate_response(STANDARD_QUESTION))
+
+    fast, standard = service.router.fast, service.router.standard
+    assert service.response_cache.get(service._cache_key(faq, fast)) is not None
+    assert service.response_cache.get(service._cache_key(STANDARD_QUESTION, standard)) is not None
+    assert service._cache_key(faq, fast)[1] != service._cache_key(faq, standard)[1]
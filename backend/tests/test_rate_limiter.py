@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import InMemoryBucketStore, RateLimitExceeded, RateLimiter
+
+
+def _limiter(**limits) -> RateLimiter:
+    return RateLimiter(InMemoryBucketStore(), **limits)
+
+
+def test_ip_budget_is_enforced():
+    limiter = _limiter(requests_per_minute=3)
+
+    async def run():
+        for _ in range(3):
+            await limiter.check("1.2.3.4")
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.check("1.2.3.4")
+        assert exc.value.scope == "ip_requests"
+        assert exc.value.retry_after >= 1
+        # Other clients have their own bucket
+        await limiter.check("5.6.7.8")
+
+    asyncio.run(run())
+    assert limiter.rejections["ip_requests"] == 1
+
+
+def test_rejected_request_consumes_no_conversation_token():
+    limiter = _limiter(requests_per_minute=2, conversation_requests_per_minute=3)
+
+    async def run():
+        await limiter.check("1.2.3.4", "conv-a")
+        await limiter.check("1.2.3.4", "conv-a")
+        # The IP bucket is empty now; these must not drain conv-a
+        for _ in range(5):
+            with pytest.raises(RateLimitExceeded) as exc:
+                await limiter.check("1.2.3.4", "conv-a")
+            assert exc.value.scope == "ip_requests"
+        # conv-a still has its third request, from another client
+        await limiter.check("5.6.7.8", "conv-a")
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.check("9.9.9.9", "conv-a")
+        assert exc.value.scope == "conversation_requests"
+
+    asyncio.run(run())
+
+
+def test_token_debt_blocks_next_request():
+    limiter = _limiter(tokens_per_minute=1000)
+
+    async def run():
+        await limiter.check("1.2.3.4")
+        await limiter.record_tokens("1.2.3.4", None, 5000)
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.check("1.2.3.4")
+        assert exc.value.scope == "ip_tokens"
+
+    asyncio.run(run())
+
+
+def test_disabled_limiter_admits_everything():
+    limiter = RateLimiter(InMemoryBucketStore(), requests_per_minute=1, enabled=False)
+
+    async def run():
+        for _ in range(10):
+            await limiter.check("1.2.3.4", "conv")
+
+    asyncio.run(run())
+
+
+def test_store_evicts_beyond_max_keys():
+    store = InMemoryBucketStore(max_keys=10)
+
+    async def run():
+        for i in range(100):
+            await store.consume([(f"k{i}", 1, 1.0, 5.0)])
+
+    asyncio.run(run())
+    assert len(store) <= 11
+    assert store.evicted >= 89
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from google.genai import errors
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, is_retryable
+
+
+def _error(code):
+    return errors.APIError(code, {"error": {"code": code, "message": "fake", "status": "FAKE"}})
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=30)
+    for _ in range(3):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.allow()
+    assert raised.value.retry_after == 30
+    assert breaker.rejected_calls == 1
+
+
+def test_breaker_lets_one_probe_through_when_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=30)
+    breaker.record_failure()
+    clock.now += 31
+
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=5, recovery_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 31
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_only_transient_errors_are_retryable():
+    assert is_retryable(_error(503))
+    assert is_retryable(_error(429))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(_error(400))
+    assert not is_retryable(ValueError())
+
+
+def _caller(**kwargs):
+    return ResilientCaller(CircuitBreaker(failure_threshold=10), base_delay_seconds=0.001,
+                           max_delay_seconds=0.001, **kwargs)
+
+
+def test_transient_errors_are_retried():
+    caller = _caller(max_retries=2)
+    outcomes = [_error(503), _error(503), "ok"]
+
+    async def attempt():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(caller.call(attempt)) == "ok"
+    assert caller.retries == 2
+    assert caller.breaker.consecutive_failures == 0
+
+
+def test_permanent_errors_are_not_retried():
+    caller = _caller(max_retries=2)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        raise _error(400)
+
+    with pytest.raises(errors.APIError):
+        asyncio.run(caller.call(attempt))
+    assert len(calls) == 1
+
+
+def test_attempts_time_out():
+    caller = _caller(max_retries=0, timeout_seconds=0.01)
+
+    async def attempt():
+        await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(caller.call(attempt))
+    assert caller.timeouts == 1
+
+
+def test_hedge_wins_when_the_first_request_is_slow():
+    caller = _caller(hedge_after_seconds=0.01)
+    delays = [1.0, 0.0]
+
+    async def attempt():
+        await asyncio.sleep(delays.pop(0))
+        return "ok"
+
+    assert asyncio.run(caller.call(attempt)) == "ok"
+    assert (caller.hedges, caller.hedge_wins) == (1, 1)
+
+
+@pytest.mark.parametrize("cancel_after", [0.01, 0.05])
+def test_cancelled_caller_cancels_hedged_requests(cancel_after):
+    """Cancelled before the hedge starts (0.01s) and while both requests run (0.05s)"""
+    caller = _caller(hedge_after_seconds=0.03)
+    started, cancelled = [], []
+
+    async def attempt():
+        started.append(1)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def scenario():
+        call = asyncio.ensure_future(caller.call(attempt))
+        await asyncio.sleep(cancel_after)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+        # Checked inside the loop: asyncio.run cancels leftover tasks on exit
+        assert started and len(cancelled) == len(started)
+
+    asyncio.run(scenario())
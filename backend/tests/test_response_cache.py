@@ -0,0 +1,59 @@
+import sys
+import time
+
+from response_cache import ResponseCache, entry_size, normalize_message
+
+
+def _key(message):
+    return ("gemini-2.0-flash", "fingerprint-abc123", normalize_message(message))
+
+
+def test_entry_size_counts_key_components():
+    key = _key("What helps with a cold?")
+    text = "Rest and fluids."
+    components = sum(sys.getsizeof(part) for part in key)
+    assert entry_size(key, text) == sys.getsizeof(key) + components + sys.getsizeof(text)
+    assert entry_size(key, text) > sys.getsizeof(key) + sys.getsizeof(text)
+
+
+def test_size_bytes_returns_to_zero_after_eviction_and_replacement():
+    key = _key("a")
+    cache = ResponseCache(max_bytes=3 * entry_size(key, "x" * 100))
+    for i in range(10):
+        cache.put(_key(str(i)), "x" * 100, tokens=25)
+        assert cache.size_bytes <= cache.max_bytes
+    assert cache.evictions == 7
+    assert cache.size_bytes == sum(entry.size for entry in cache._entries.values())
+
+    cache.put(_key("9"), "y" * 50, tokens=12)
+    assert cache.size_bytes == sum(entry.size for entry in cache._entries.values())
+
+    cache.clear()
+    assert cache.size_bytes == 0
+
+
+def test_long_messages_count_against_the_bound():
+    text = "ok"
+    cache = ResponseCache(max_bytes=entry_size(_key("short"), text) * 2)
+    cache.put(_key("x" * 10000), text, tokens=1)
+    assert len(cache) == 0
+
+
+def test_lru_order_and_hit_rate():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A", 1)
+    cache.put("b", "B", 1)
+    assert cache.get("a").text == "A"
+    cache.put("c", "C", 1)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["hit_rate_percent"] == 66.67
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = ResponseCache(ttl_seconds=10)
+    cache.put("a", "A", 1)
+    now = time.monotonic()
+    monkeypatch.setattr("response_cache.time.monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
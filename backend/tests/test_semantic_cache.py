@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from semantic_cache import HashingEmbedder, SemanticCache
+
+FAST = ("gemini-2.5-flash-lite", "fast-config")
+STANDARD = ("gemini-2.5-flash", "standard-config")
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(HashingEmbedder(), max_entries=8)
+
+
+def test_rephrased_question_matches_in_its_namespace(cache):
+    cache.put(cache.embed("What are the symptoms of the flu?"), STANDARD, "Fever and aches", 12)
+
+    cached = cache.get(cache.embed("what are flu symptoms"), STANDARD)
+    assert cached is not None and cached.text == "Fever and aches"
+
+
+def test_answers_are_not_shared_across_models_or_configs(cache):
+    cache.put(cache.embed("What are the symptoms of the flu?"), STANDARD, "Fever and aches", 12)
+
+    assert cache.get(cache.embed("What are the symptoms of the flu?"), FAST) is None
+    assert cache.get(cache.embed("What are the symptoms of the flu?"), (STANDARD[0], "other-config")) is None
+
+    cache.put(cache.embed("What are the symptoms of the flu?"), FAST, "Short answer", 3)
+    assert cache.get(cache.embed("what are flu symptoms"), FAST).text == "Short answer"
+    assert cache.get(cache.embed("what are flu symptoms"), STANDARD).text == "Fever and aches"
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import token_counter
+from token_counter import TokenCounter, estimate_tokens
+
+GERMAN = (
+    "Seit drei Wochen habe ich Kopfschmerzen, Schwindelgefühle und Schlafstörungen. "
+    "Meine Hausärztin vermutet eine Nasennebenhöhlenentzündung oder Bluthochdruck. "
+)
+
+
+def test_estimate_is_at_least_a_token_per_four_characters():
+    text = (GERMAN * 20)[:2000]
+    assert estimate_tokens(text) >= len(text) // 4
+
+
+def test_estimate_handles_empty_and_cjk_text():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("头痛发烧怎么办") >= 7
+
+
+def test_load_counts_with_the_public_tokenizer_api(monkeypatch):
+    calls = []
+
+    class Tokenizer:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def count_tokens(self, contents):
+            calls.append(contents)
+            return SimpleNamespace(total_tokens=42)
+
+    monkeypatch.setattr(token_counter, "LocalTokenizer", Tokenizer, raising=False)
+    monkeypatch.setattr(token_counter, "LOCAL_TOKENIZER_AVAILABLE", True)
+
+    counter = TokenCounter("gemini-2.5-flash")
+    counter.count("What is a fever?")
+    assert counter.load()
+    assert counter.backend == "local_tokenizer"
+    # The estimate cached before load() is discarded
+    assert counter.count("What is a fever?") == 42
+    assert counter.count("What is a fever?") == 42
+    assert calls == ["What is a fever?"]
+
+
+def test_counter_falls_back_to_estimate():
+    counter = TokenCounter("gemini-2.5-flash")
+    assert counter.backend == "estimate"
+    assert counter.count(GERMAN) == estimate_tokens(GERMAN)
@@ -0,0 +1,71 @@
+"""
+HealthBot Monitor - Timing Middleware
+Pure ASGI request instrumentation: per-route latency, in-flight requests,
+request/response bytes and status codes, plus the X-Process-Time-Ms header
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+ASGIApp = Callable[[Dict[str, Any], Callable, Callable], Awaitable[None]]
+
+# Routes that matched nothing share one tag, so scanners can't blow up cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class TimingMiddleware:
+    """
+    Wraps the app's send/receive instead of buffering the response like
+    @app.middleware("http") (BaseHTTPMiddleware) does, so streaming bodies
+    pass straight through. X-Process-Time-Ms is the time to the response
+    headers; the recorded latency runs until the last body chunk is sent.
+    """
+    
+    def __init__(self, app: ASGIApp, metrics):
+        self.app = app
+        self.metrics = metrics
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        metrics = self.metrics
+        start = time.perf_counter()
+        state = {"status": 500, "request_bytes": 0, "response_bytes": 0}
+        
+        metrics.log_event("request_received", {
+            "path": scope["path"],
+            "method": scope["method"]
+        })
+        metrics.track_http_start()
+        
+        async def receive_counted():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["request_bytes"] += len(message.get("body", b""))
+            return message
+        
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                message["headers"] = list(message.get("headers", ())) + [
+                    (b"x-process-time-ms", str(round(elapsed_ms, 2)).encode())
+                ]
+            elif message["type"] == "http.response.body":
+                state["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive_counted, send_timed)
+        finally:
+            # The router records the matched route in the (shared) scope
+            route = scope.get("route")
+            metrics.track_http_request(
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                method=scope["method"],
+                status=state["status"],
+                latency_ms=(time.perf_counter() - start) * 1000,
+                request_bytes=state["request_bytes"],
+                response_bytes=state["response_bytes"]
+            )
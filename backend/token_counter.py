@@ -0,0 +1,128 @@
+"""
+HealthBot Monitor - Token Counter
+Local token counting for prompt budgets and usage metrics
+"""
+import string
+from functools import lru_cache
+from typing import Any, Dict
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Gemini's own tokenizer needs sentencepiece and protobuf (see requirements.txt)
+# and downloads its model file the first time it is loaded; without them the
+# counter keeps using the estimate
+try:
+    from google.genai.local_tokenizer import LocalTokenizer
+    LOCAL_TOKENIZER_AVAILABLE = True
+except ImportError:
+    LOCAL_TOKENIZER_AVAILABLE = False
+
+# Byte -> character class for ASCII text: letters, digits, spaces, newlines
+# and everything else (punctuation / markdown symbols)
+_CLASSES = bytearray(b"p" * 256)
+for _byte in string.ascii_letters.encode():
+    _CLASSES[_byte] = ord("a")
+for _byte in string.digits.encode():
+    _CLASSES[_byte] = ord("d")
+for _byte in b" \t\r\x0b\x0c":
+    _CLASSES[_byte] = ord(" ")
+_CLASSES[ord("\n")] = ord("n")
+_CLASSES = bytes(_CLASSES)
+
+
+def _run_starts(classes: bytes, cls: bytes, others: tuple) -> int:
+    """Number of runs of `cls` in the class string"""
+    return sum(classes.count(other + cls) for other in others) + classes.startswith(cls)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Script-aware token estimate, tuned to a large SentencePiece vocabulary
+    Common English words are a single token, digits are split individually,
+    punctuation runs cost a token per two characters, CJK characters about
+    one token each and other non-ASCII scripts about one per three characters.
+    Never less than one token per four characters, so prompt budgets err on
+    the safe side for text the vocabulary splits more finely (e.g. German
+    compounds). Built from bytes.translate/count so a 2000-char message
+    takes tens of µs.
+    """
+    if not text:
+        return 0
+    
+    ascii_bytes = text.encode("ascii", "ignore")
+    classes = ascii_bytes.translate(_CLASSES)
+    tokens = (
+        _run_starts(classes, b"a", (b" ", b"p", b"d", b"n"))
+        # Long words (e.g. medical terms) split into more pieces
+        + classes.count(b"a" * 12)
+        + classes.count(b"d")
+        + (classes.count(b"p") + _run_starts(classes, b"p", (b" ", b"a", b"d", b"n")) + 1) // 2
+        + _run_starts(classes, b"n", (b" ", b"a", b"d", b"p"))
+    )
+    
+    non_ascii = len(text) - len(ascii_bytes)
+    if non_ascii:
+        # UTF-8 width separates 3-4 byte characters (CJK, kana, hangul, emoji)
+        # from 2-byte ones (accented Latin, Cyrillic, Greek, Arabic, ...)
+        wide = len(text.encode("utf-8")) - len(ascii_bytes) - 2 * non_ascii
+        tokens += wide + (non_ascii - wide + 2) // 3
+    return max(tokens, len(text) // 4)
+
+
+class TokenCounter:
+    """
+    Counts tokens locally, memoizing repeated strings (system prompt,
+    conversation turns, FAQ questions) in an LRU cache
+    Uses Gemini's local tokenizer once `load()` has succeeded and the
+    script-aware estimate until then (or if it is unavailable).
+    """
+    
+    def __init__(self, model_name: str, cache_size: int = 4096):
+        self.model_name = model_name
+        self.backend = "estimate"
+        self._encode = None
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+    
+    def load(self) -> bool:
+        """
+        Switch to Gemini's tokenizer (blocking; may download the model file)
+        
+        Returns:
+            Whether the local tokenizer is now in use
+        """
+        if not LOCAL_TOKENIZER_AVAILABLE:
+            return False
+        
+        try:
+            tokenizer = LocalTokenizer(model_name=self.model_name)
+            # Repeated strings are answered by the LRU cache in front of this
+            self._encode = lambda text: tokenizer.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning("Local tokenizer unavailable, using estimate", error=str(e))
+            return False
+        
+        self.backend = "local_tokenizer"
+        # Counts cached so far came from the estimate
+        self.count.cache_clear()
+        logger.info("Local tokenizer loaded", model=self.model_name)
+        return True
+    
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is not None:
+            return self._encode(text)
+        return estimate_tokens(text)
+    
+    def stats(self) -> Dict[str, Any]:
+        info = self.count.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "backend": self.backend,
+            "cache_entries": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0
+        }
@@ -6,7 +6,7 @@ import React, { useState, useEffect } from 'react';
 import Landing from './components/Landing';
 import Chat from './components/Chat';
 import Dashboard from './components/Dashboard';
-import { checkHealth } from './services/api';
+import { checkHealth, subscribeDashboard, mergeDashboardDelta } from './services/api';
 import './App.css';
 
 // Professional SVG Icons
@@ -51,8 +51,11 @@ function App() {
   const [isConnected, setIsConnected] = useState(false);
   const [connectionError, setConnectionError] = useState(null);
   const [isCheckingConnection, setIsCheckingConnection] = useState(true);
+  const [dashboard, setDashboard] = useState(null);
+  const [isStreaming, setIsStreaming] = useState(false);
 
-  // Check API connection on mount
+  // Check API connection on mount, then follow the live dashboard stream;
+  // /health is polled only while the stream is down
   useEffect(() => {
     const checkConnection = async () => {
       try {
@@ -69,10 +72,38 @@ function App() {
     };
 
     checkConnection();
-    
-    // Periodically check connection
-    const interval = setInterval(checkConnection, 30000);
-    return () => clearInterval(interval);
+
+    let interval = null;
+    const stopPolling = () => {
+      if (interval) clearInterval(interval);
+      interval = null;
+    };
+
+    const unsubscribe = subscribeDashboard(
+      (snapshot) => {
+        // Sent on every (re)connect
+        stopPolling();
+        setDashboard(snapshot);
+        setIsStreaming(true);
+        setIsConnected(true);
+        setConnectionError(null);
+        setIsCheckingConnection(false);
+      },
+      (delta) => setDashboard((current) => mergeDashboardDelta(current, delta)),
+      () => {
+        // EventSource keeps reconnecting on its own; poll until it succeeds
+        setIsStreaming(false);
+        if (!interval) {
+          checkConnection();
+          interval = setInterval(checkConnection, 30000);
+        }
+      }
+    );
+
+    return () => {
+      stopPolling();
+      unsubscribe();
+    };
   }, []);
 
   // Handle navigation from landing page
@@ -180,7 +211,7 @@ function App() {
       {/* Main Content */}
       <main className="main-content">
         <div className="tab-content">
-          {activeTab === 'chat' ? <Chat /> : <Dashboard />}
+          {activeTab === 'chat' ? <Chat /> : <Dashboard live={dashboard} streaming={isStreaming} />}
         </div>
       </main>
 
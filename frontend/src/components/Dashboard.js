@@ -142,7 +142,9 @@ const StatusBadge = ({ status, text }) => (
   </span>
 );
 
-function Dashboard() {
+// Live data comes from App's /dashboard/stream subscription; the dashboard
+// polls only while that stream is down
+function Dashboard({ live = null, streaming = false }) {
   const [metrics, setMetrics] = useState(null);
   const [stats, setStats] = useState(null);
   const [alerts, setAlerts] = useState([]);
@@ -153,6 +155,18 @@ function Dashboard() {
   // eslint-disable-next-line no-unused-vars
   const [setupMessage, setSetupMessage] = useState(null);
 
+  // Chart points for the response time history
+  const applyHistory = (dashboardData) => {
+    if (dashboardData.response_time_history) {
+      const historyData = dashboardData.response_time_history.map((item, index) => ({
+        name: `#${index + 1}`,
+        responseTime: item.value,
+        time: new Date(item.timestamp).toLocaleTimeString()
+      }));
+      setResponseTimeHistory(historyData);
+    }
+  };
+
   // Fetch metrics
   const fetchMetrics = async () => {
     try {
@@ -166,16 +180,7 @@ function Dashboard() {
       setMetrics(metricsData);
       setStats(statsData);
       setAlerts(alertsData.alerts || []);
-
-      // Process response time history for chart
-      if (dashboardData.response_time_history) {
-        const historyData = dashboardData.response_time_history.map((item, index) => ({
-          name: `#${index + 1}`,
-          responseTime: item.value,
-          time: new Date(item.timestamp).toLocaleTimeString()
-        }));
-        setResponseTimeHistory(historyData);
-      }
+      applyHistory(dashboardData);
 
       setLastUpdated(new Date());
     } catch (error) {
@@ -185,19 +190,28 @@ function Dashboard() {
     }
   };
 
-  // Initial fetch and auto-refresh
+  // Initial fetch (also loads the service stats the stream doesn't carry)
   useEffect(() => {
     fetchMetrics();
+  }, []);
 
-    let interval;
-    if (autoRefresh) {
-      interval = setInterval(fetchMetrics, 5000); // Refresh every 5 seconds
-    }
+  // Apply each live snapshot or merged delta
+  useEffect(() => {
+    if (!autoRefresh || !live) return;
+    setMetrics(live.metrics);
+    setAlerts((live.recent_alerts || []).map((alert) => ({ ...alert, type: alert.status })));
+    applyHistory(live);
+    setLastUpdated(new Date());
+    setIsLoading(false);
+  }, [live, autoRefresh]);
+
+  // Fall back to polling while the stream is down
+  useEffect(() => {
+    if (!autoRefresh || streaming) return undefined;
 
-    return () => {
-      if (interval) clearInterval(interval);
-    };
-  }, [autoRefresh]);
+    const interval = setInterval(fetchMetrics, 5000); // Refresh every 5 seconds
+    return () => clearInterval(interval);
+  }, [autoRefresh, streaming]);
 
   // Format uptime
   const formatUptime = (seconds) => {
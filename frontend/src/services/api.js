@@ -98,6 +98,65 @@ export const getDashboardData = async () => {
   }
 };
 
+/**
+ * Subscribe to Live Dashboard
+ * Receives a full snapshot on connect, then deltas with only what changed.
+ * Returns a function that closes the stream.
+ */
+export const subscribeDashboard = (onSnapshot, onDelta, onError = null) => {
+  const source = new EventSource(`${API_BASE_URL}/dashboard/stream`);
+
+  source.addEventListener('snapshot', (event) => onSnapshot(JSON.parse(event.data)));
+  source.addEventListener('delta', (event) => onDelta(JSON.parse(event.data)));
+  source.onerror = (error) => {
+    console.error('❌ Dashboard stream error:', error);
+    if (onError) onError(error);
+  };
+
+  return () => source.close();
+};
+
+const HISTORY_SERIES = ['response_time_history', 'error_rate_history', 'token_usage_history'];
+
+// History range of /dashboard/stream (DASHBOARD_STREAM_RANGE_SECONDS on the backend)
+const DASHBOARD_STREAM_RANGE_MS = 15 * 60 * 1000;
+
+/**
+ * Merge Dashboard Delta
+ * Applies a stream delta to the last snapshot: changed counters and windows
+ * are overwritten, history points replace the point with the same timestamp
+ * or are appended (points older than the stream's 15 minute range drop off),
+ * and alerts are replaced whole.
+ */
+export const mergeDashboardDelta = (snapshot, delta) => {
+  if (!snapshot) return snapshot;
+  const merged = { ...snapshot };
+
+  if (delta.metrics) {
+    merged.metrics = { ...snapshot.metrics, ...delta.metrics };
+  }
+  if (delta.windows) {
+    merged.windows = { ...snapshot.windows };
+    Object.entries(delta.windows).forEach(([name, changed]) => {
+      merged.windows[name] = { ...snapshot.windows[name], ...changed };
+    });
+  }
+  HISTORY_SERIES.forEach((series) => {
+    if (!delta[series]) return;
+    const points = new Map(snapshot[series].map((point) => [point.timestamp, point]));
+    delta[series].forEach((point) => points.set(point.timestamp, point));
+    const sorted = [...points.values()].sort((a, b) => (a.timestamp < b.timestamp ? -1 : 1));
+    // Measured from the newest point, so client clock and timezone don't matter
+    const cutoff = Date.parse(sorted[sorted.length - 1].timestamp) - DASHBOARD_STREAM_RANGE_MS;
+    merged[series] = sorted.filter((point) => Date.parse(point.timestamp) >= cutoff);
+  });
+  if (delta.recent_alerts) {
+    merged.recent_alerts = delta.recent_alerts;
+  }
+
+  return merged;
+};
+
 /**
  * Get Detailed Stats
  * Get detailed statistics for debugging